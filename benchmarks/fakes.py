@@ -0,0 +1,311 @@
+"""Local stand-ins for the market API, GitHub and OpenAI used by the benchmarks."""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import git
+
+Response = tuple[int, Any]
+
+NOT_FOUND: Response = (404, {"message": "Not Found"})
+
+
+class FakeApp(ABC):
+    """Routes one fake service's requests."""
+
+    @abstractmethod
+    def handle(self, method: str, path: str, query: dict, body: Any) -> Response:
+        """Return the status code and JSON payload answering one request."""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeServer"
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        body = json.loads(raw_body) if raw_body else None
+        status, payload = self.server.app.handle(
+            method, unquote(url.path), parse_qs(url.query), body
+        )
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under concurrent clients, and the
+    # SYN retransmit adds a second to the measured latency.
+    request_queue_size = 128
+
+    def __init__(self, app: FakeApp, latency: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.app = app
+        self.latency = latency
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class FakeMarket(FakeApp):
+    """Market API with generated open instances and proposal history.
+
+    ``awarded`` proposals from the last hour point at instances ready to solve;
+    ``history`` older or unawarded proposals pad the listing the way a long-running
+    provider's history does.
+    """
+
+    def __init__(
+        self,
+        open_instances: int,
+        awarded: int,
+        history: int,
+        repos: int,
+        open_code: int = 0,
+        resolved_code: int = 3,
+        awarded_code: int = 1,
+    ) -> None:
+        now = datetime.utcnow()
+        self.open_instances = [
+            {
+                "id": f"open-{i}",
+                "background": f"Fix issue {i} in https://github.com/upstream/repo{i % repos}",
+                "status": open_code,
+            }
+            for i in range(open_instances)
+        ]
+        self.solve_instances = {
+            f"solve-{i}": {
+                "id": f"solve-{i}",
+                "background": (
+                    f"Add a greeting for case {i}. "
+                    f"Repository URL: https://github.com/upstream/repo{i % repos}"
+                ),
+                "status": resolved_code,
+            }
+            for i in range(awarded)
+        }
+        self.proposals = [
+            {
+                "id": f"award-{i}",
+                "instance_id": f"solve-{i}",
+                "status": awarded_code,
+                "creation_date": (now - timedelta(minutes=i + 1)).isoformat(),
+            }
+            for i in range(awarded)
+        ] + [
+            {
+                "id": f"history-{i}",
+                "instance_id": f"history-{i}",
+                "status": awarded_code if i % 2 else awarded_code + 1,
+                "creation_date": (now - timedelta(days=2 + i % 365)).isoformat(),
+            }
+            for i in range(history)
+        ]
+        self.bids: list[str] = []
+        self.messages: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def handle(self, method: str, path: str, query: dict, body: Any) -> Response:
+        parts = path.strip("/").split("/")
+        if method == "GET" and path == "/v1/instances/":
+            return 200, self.open_instances
+        if method == "GET" and parts[:2] == ["v1", "instances"] and len(parts) == 3:
+            instance = self.solve_instances.get(parts[2])
+            return (200, instance) if instance else NOT_FOUND
+        if method == "GET" and path == "/v1/proposals/":
+            return 200, self.proposals
+        if method == "POST" and parts[:4] == ["v1", "proposals", "create", "for-instance"]:
+            with self._lock:
+                self.bids.append(parts[4])
+            return 200, {"id": f"bid-{parts[4]}"}
+        if method == "GET" and parts[:2] == ["v1", "chat"]:
+            return 200, []
+        if method == "POST" and parts[:3] == ["v1", "chat", "send-message"]:
+            with self._lock:
+                self.messages[parts[3]] = body["message"]
+            return 200, {}
+        return NOT_FOUND
+
+
+class FakeGitHub(FakeApp):
+    """GitHub REST stand-in backed by bare repositories under ``root``.
+
+    Remotes live at ``<root>/github.com/<owner>/<repo>.git`` so git can be pointed
+    at them with a ``url.<base>.insteadOf`` rewrite of ``https://github.com/``.
+    """
+
+    def __init__(self, root: str, fork_owner: str) -> None:
+        self.root = root
+        self.fork_owner = fork_owner
+        self.pull_requests: list[dict] = []
+        self._lock = threading.Lock()
+
+    def remote_path(self, full_name: str) -> str:
+        return os.path.join(self.root, "github.com", f"{full_name}.git")
+
+    def create_upstream(self, full_name: str) -> None:
+        with tempfile.TemporaryDirectory() as work_dir:
+            repo = git.Repo.init(work_dir, initial_branch="main")
+            files = {
+                "README.md": f"# {full_name}\n\nA repository used by the benchmarks.\n",
+                "Makefile": "test:\n\tpython -m unittest discover\n",
+                "greeting.py": "def greet(name):\n    return f'Hello, {name}!'\n",
+            }
+            for name, content in files.items():
+                with open(os.path.join(work_dir, name), "w", encoding="utf-8") as f:
+                    f.write(content)
+            repo.index.add(list(files))
+            author = git.Actor("Benchmark", "benchmark@example.com")
+            repo.index.commit("Initial commit", author=author, committer=author)
+            git.Repo.clone_from(work_dir, self.remote_path(full_name), bare=True)
+
+    def _exists(self, full_name: str) -> bool:
+        return os.path.isdir(self.remote_path(full_name))
+
+    def _has_branch(self, full_name: str, branch: str) -> bool:
+        try:
+            git.Repo(self.remote_path(full_name)).git.rev_parse("--verify", f"refs/heads/{branch}")
+            return True
+        except git.GitCommandError:
+            return False
+
+    def _repo(self, full_name: str) -> dict:
+        owner, name = full_name.split("/")
+        return {
+            "full_name": full_name,
+            "name": name,
+            "owner": {"login": owner},
+            "default_branch": "main",
+            "size": 10,
+            "clone_url": f"https://github.com/{full_name}.git",
+            "html_url": f"https://github.com/{full_name}",
+            "url": f"/repos/{full_name}",
+        }
+
+    def _fork(self, full_name: str) -> dict:
+        fork_name = f"{self.fork_owner}/{full_name.split('/')[1]}"
+        with self._lock:
+            if not self._exists(fork_name):
+                git.Repo.clone_from(
+                    self.remote_path(full_name), self.remote_path(fork_name), bare=True
+                )
+        return self._repo(fork_name)
+
+    def _pull(self, full_name: str, body: dict) -> dict:
+        with self._lock:
+            number = len(self.pull_requests) + 1
+            pull = {
+                "number": number,
+                "title": body.get("title"),
+                "head": body.get("head"),
+                "base": body.get("base"),
+                "html_url": f"https://github.com/{full_name}/pull/{number}",
+                "url": f"/repos/{full_name}/pulls/{number}",
+            }
+            self.pull_requests.append(pull)
+        return pull
+
+    def handle(self, method: str, path: str, query: dict, body: Any) -> Response:
+        parts = path.strip("/").split("/")
+        if parts[0] != "repos" or len(parts) < 3:
+            return NOT_FOUND
+        full_name = f"{parts[1]}/{parts[2]}"
+        rest = parts[3:]
+        if not self._exists(full_name):
+            return NOT_FOUND
+
+        if method == "GET" and not rest:
+            return 200, self._repo(full_name)
+        if method == "GET" and rest[:1] == ["branches"]:
+            branch = "/".join(rest[1:])
+            if self._has_branch(full_name, branch):
+                return 200, {"name": branch}
+            return NOT_FOUND
+        if method == "GET" and rest[:3] == ["git", "ref", "heads"]:
+            branch = "/".join(rest[3:])
+            if self._has_branch(full_name, branch):
+                return 200, {"ref": f"refs/heads/{branch}"}
+            return NOT_FOUND
+        if method == "POST" and rest == ["forks"]:
+            return 202, self._fork(full_name)
+        if method == "POST" and rest == ["merge-upstream"]:
+            return 200, {"message": "This branch is not behind the upstream."}
+        if method == "GET" and rest[:1] == ["compare"]:
+            return 200, {"status": "ahead", "ahead_by": 1, "total_commits": 1, "commits": []}
+        if method == "POST" and rest == ["pulls"]:
+            return 201, self._pull(full_name, body)
+        return NOT_FOUND
+
+
+class FakeOpenAI(FakeApp):
+    """Chat completions endpoint answering JSON-mode requests with PR metadata."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def handle(self, method: str, path: str, query: dict, body: Any) -> Response:
+        if method != "POST" or not path.endswith("/chat/completions"):
+            return NOT_FOUND
+        with self._lock:
+            self.requests += 1
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps(
+                {"title": "Add a greeting", "body": "Adds the requested greeting."}
+            )
+        else:
+            content = "- Edited greeting.py to add the requested greeting.\n- Tests passed."
+        return 200, {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+
+def git_url_rewrite_env(root: str, token: str) -> dict[str, str]:
+    """Environment making git resolve github.com URLs, with or without a token, under ``root``."""
+    local_base = f"file://{os.path.join(root, 'github.com')}/"
+    prefixes = ["https://github.com/", f"https://{token}@github.com/"]
+    env = {"GIT_CONFIG_COUNT": str(len(prefixes))}
+    for index, prefix in enumerate(prefixes):
+        env[f"GIT_CONFIG_KEY_{index}"] = f"url.{local_base}.insteadOf"
+        env[f"GIT_CONFIG_VALUE_{index}"] = prefix
+    return env
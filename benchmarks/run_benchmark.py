@@ -0,0 +1,254 @@
+"""Measure scan and solve throughput against local fakes.
+
+Starts fake market, GitHub and OpenAI servers, creates bare git remotes for the
+upstream repositories and replaces the aider container with a stub that commits
+a change. The real handlers then run one scan and one solve cycle with tracing
+on, and the spans are summarized per stage.
+
+    python -m benchmarks.run_benchmark --open-instances 200 --awarded 8 --history 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from benchmarks.fakes import (
+    FakeGitHub,
+    FakeMarket,
+    FakeOpenAI,
+    FakeServer,
+    git_url_rewrite_env,
+)
+
+GITHUB_TOKEN = "benchmark-token"
+FORK_OWNER = "bench-bot"
+STUB_SOLVER_LOG = """Added greeting.py to the chat.
+Applied edit to greeting.py
+Commit {sha} Add the requested greeting
+Tokens: 1.2k sent, 85 received. Cost: $0.0040 message, $0.0040 session.
+Running make test
+Ran 1 test in 0.001s
+OK - 1 passed
+"""
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--open-instances", type=int, default=100, help="Open instances to bid on.")
+    parser.add_argument("--awarded", type=int, default=8, help="Awarded instances to solve.")
+    parser.add_argument(
+        "--history", type=int, default=2000, help="Old proposals padding the proposal listing."
+    )
+    parser.add_argument("--repos", type=int, default=4, help="Distinct upstream repositories.")
+    parser.add_argument("--workers", type=int, default=4, help="SOLVER_WORKERS for the run.")
+    parser.add_argument(
+        "--latency-ms", type=float, default=20, help="Latency added to every fake API request."
+    )
+    parser.add_argument(
+        "--solver-seconds", type=float, default=1.0, help="Time the stub solver takes per instance."
+    )
+    parser.add_argument(
+        "--work-dir", help="Keep remotes, state and traces here instead of a temp dir."
+    )
+    parser.add_argument("--output", help="Also write the report to this file as JSON.")
+    parser.add_argument("--log-level", default="WARNING", help="Log level of the handlers.")
+    return parser.parse_args()
+
+
+def _stub_workspace(workspace_root: str):
+    """Replacement for solver_workspace that reserves a directory but no container."""
+    from src.aider_solver.launch_container import SolverWorkspace
+
+    @contextmanager
+    def solver_workspace() -> Iterator[SolverWorkspace]:
+        os.makedirs(workspace_root, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=workspace_root) as path:
+            yield SolverWorkspace(path=path, container=None)
+
+    return solver_workspace
+
+
+def _stub_solver(solver_seconds: float):
+    """Replacement for launch_container_with_repo_mounted that commits a change locally."""
+    import git
+
+    from src.aider_solver.launch_container import SolverWorkspace, _clean_logs
+    from src.utils.tracing import span
+
+    def launch(
+        workspace: SolverWorkspace,
+        model_name: str,
+        instance_background: str,
+        test_command: str,
+        timeout: Optional[float] = None,
+    ) -> str:
+        with span("solver.stub_run"):
+            time.sleep(solver_seconds)
+            repo = git.Repo(workspace.path)
+            path = os.path.join(workspace.path, "greeting.py")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n\ndef greet_benchmark():\n    return greet('benchmark')\n")
+            repo.index.add(["greeting.py"])
+            commit = repo.index.commit("Add the requested greeting")
+        return _clean_logs(STUB_SOLVER_LOG.format(sha=commit.hexsha[:7]))
+
+    return launch
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summarize_spans(trace_file: str) -> dict[str, dict[str, float]]:
+    durations: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    with open(trace_file, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            durations[record["name"]].append(record["duration_ms"])
+            if record["status"] == "error":
+                errors[record["name"]] += 1
+    return {
+        name: {
+            "count": len(values),
+            "errors": errors[name],
+            "total_ms": sum(values),
+            "mean_ms": statistics.fmean(values),
+            "p50_ms": _percentile(values, 50),
+            "p95_ms": _percentile(values, 95),
+            "max_ms": max(values),
+        }
+        for name, values in durations.items()
+    }
+
+
+def _format_report(report: dict) -> str:
+    lines = [""]
+    for phase in ("scan", "solve"):
+        result = report[phase]
+        lines.append(
+            f"{phase}: {result['items']} {result['unit']} in {result['seconds']:.2f}s "
+            f"({result['per_second']:.2f}/s)"
+        )
+    lines.append(
+        f"bids: {report['bids']}, pull requests: {report['pull_requests']}, "
+        f"messages: {report['messages']}, llm requests: {report['llm_requests']}"
+    )
+    lines.append("")
+    header = f"{'span':<40} {'count':>6} {'err':>4}" + "".join(
+        f" {column:>9}" for column in ("mean ms", "p50 ms", "p95 ms", "max ms")
+    )
+    lines += [header, "-" * len(header)]
+    spans = sorted(report["spans"].items(), key=lambda item: -item[1]["total_ms"])
+    for name, stats in spans:
+        lines.append(
+            f"{name[:40]:<40} {stats['count']:>6} {stats['errors']:>4} {stats['mean_ms']:>9.1f} "
+            f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['max_ms']:>9.1f}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    args = _parse_args()
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="provider_benchmark_")
+    remotes_dir = os.path.join(work_dir, "remotes")
+    trace_file = os.path.join(work_dir, "trace.jsonl")
+    for path in (remotes_dir, os.path.join(work_dir, "state"), trace_file):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    latency = args.latency_ms / 1000
+    market = FakeMarket(args.open_instances, args.awarded, args.history, args.repos)
+    github = FakeGitHub(remotes_dir, FORK_OWNER)
+    openai_app = FakeOpenAI()
+    for index in range(args.repos):
+        github.create_upstream(f"upstream/repo{index}")
+    market_server = FakeServer(market, latency)
+    github_server = FakeServer(github, latency)
+    openai_server = FakeServer(openai_app, latency)
+
+    # Settings are read when the src modules are first imported.
+    os.environ.update(
+        {
+            "FOUNDATION_MODEL_NAME": "gpt-4o",
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": f"{openai_server.url}/v1",
+            "GITHUB_PAT": GITHUB_TOKEN,
+            "GITHUB_USERNAME": FORK_OWNER,
+            "GITHUB_EMAIL": "bench-bot@example.com",
+            "GITHUB_API_URL": github_server.url,
+            "MARKET_URL": market_server.url,
+            "MARKET_API_KEY": "benchmark",
+            "STATE_DIRECTORY": os.path.join(work_dir, "state"),
+            "WORKSPACE_ROOT": os.path.join(work_dir, "workspaces"),
+            "TRACE_FILE": trace_file,
+            "SOLVER_WORKERS": str(args.workers),
+            "GIT_TERMINAL_PROMPT": "0",
+            **git_url_rewrite_env(remotes_dir, GITHUB_TOKEN),
+        }
+    )
+
+    from src import aider_solver, solve_instances
+    from src.market_scan import async_market_scan_handler
+
+    aider_solver.solver_workspace = _stub_workspace(os.path.join(work_dir, "workspaces"))
+    aider_solver.launch_container_with_repo_mounted = _stub_solver(args.solver_seconds)
+
+    start = time.perf_counter()
+    considered = asyncio.run(async_market_scan_handler())
+    scan_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    attempted = solve_instances.solve_instances_handler()
+    solve_seconds = time.perf_counter() - start
+
+    report = {
+        "parameters": vars(args),
+        "scan": {
+            "items": considered,
+            "unit": "instances",
+            "seconds": scan_seconds,
+            "per_second": considered / scan_seconds if scan_seconds else 0.0,
+        },
+        "solve": {
+            "items": attempted,
+            "unit": "instances",
+            "seconds": solve_seconds,
+            "per_second": attempted / solve_seconds if solve_seconds else 0.0,
+        },
+        "bids": len(market.bids),
+        "pull_requests": len(github.pull_requests),
+        "messages": len(market.messages),
+        "llm_requests": openai_app.requests,
+        "spans": _summarize_spans(trace_file) if os.path.exists(trace_file) else {},
+    }
+    sys.stdout.write(_format_report(report))
+    sys.stdout.write(f"\nRemotes, state and trace kept in {work_dir}\n")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    for server in (market_server, github_server, openai_server):
+        server.shutdown()
+    return 0 if len(github.pull_requests) == args.awarded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,29 @@
-from .extract_test_command import suggest_test_command
-from .launch_container import launch_container_with_repo_mounted
-from .modify_repo import modify_repo_with_aider
+import importlib
+from typing import Any
 
-__all__ = ["modify_repo_with_aider", "launch_container_with_repo_mounted", "suggest_test_command"]
+# Resolved on first access (PEP 562) so the docker SDK is only loaded by processes
+# that solve instances.
+_EXPORTS = {
+    "modify_repo_with_aider": "modify_repo",
+    "launch_container_with_repo_mounted": "launch_container",
+    "suggest_test_command": "extract_test_command",
+    "detect_test_command": "detect_test_command",
+    "start_container_pool": "launch_container",
+    "solver_workspace": "launch_container",
+    "SolverWorkspace": "launch_container",
+    "SolverTimeoutError": "watchdog",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
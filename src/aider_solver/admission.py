@@ -0,0 +1,110 @@
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from src.aider_solver.watchdog import SolverTimeoutError
+
+POLL_INTERVAL_SECONDS = 5.0
+
+
+@dataclass
+class HostHeadroom:
+    load_per_cpu: Optional[float]
+    available_memory_bytes: Optional[int]
+    free_disk_bytes: int
+
+
+def _available_memory_bytes() -> Optional[int]:
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _existing_ancestor(path: str) -> str:
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    return path
+
+
+def read_host_headroom(disk_path: str) -> HostHeadroom:
+    try:
+        load_per_cpu = os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        load_per_cpu = None
+    return HostHeadroom(
+        load_per_cpu=load_per_cpu,
+        available_memory_bytes=_available_memory_bytes(),
+        free_disk_bytes=shutil.disk_usage(_existing_ancestor(disk_path)).free,
+    )
+
+
+class AdmissionController:
+    """Holds back new solver containers until the host has CPU, memory and disk to spare.
+
+    Solves that arrive while the host is saturated wait in ``admit`` and are
+    re-checked whenever a running solve finishes or the poll interval elapses,
+    until their deadline passes.
+    """
+
+    def __init__(
+        self,
+        disk_path: str,
+        max_load_per_cpu: float,
+        min_available_memory_bytes: int,
+        min_free_disk_bytes: int,
+    ) -> None:
+        self.disk_path = disk_path
+        self.max_load_per_cpu = max_load_per_cpu
+        self.min_available_memory_bytes = min_available_memory_bytes
+        self.min_free_disk_bytes = min_free_disk_bytes
+        self.running = 0
+        self._condition = threading.Condition()
+
+    def _blocking_reason(self) -> Optional[str]:
+        headroom = read_host_headroom(self.disk_path)
+        if headroom.load_per_cpu is not None and headroom.load_per_cpu > self.max_load_per_cpu:
+            return f"load per CPU {headroom.load_per_cpu:.2f} > {self.max_load_per_cpu}"
+        if (
+            headroom.available_memory_bytes is not None
+            and headroom.available_memory_bytes < self.min_available_memory_bytes
+        ):
+            return f"{headroom.available_memory_bytes // 2**20} MiB memory available"
+        if headroom.free_disk_bytes < self.min_free_disk_bytes:
+            return f"{headroom.free_disk_bytes // 2**20} MiB disk free"
+        return None
+
+    @contextmanager
+    def admit(self, deadline: Optional[float] = None) -> Iterator[None]:
+        """Wait for headroom, raising SolverTimeoutError once the monotonic ``deadline`` passes."""
+        start = time.monotonic()
+        with self._condition:
+            # The first solve is always admitted so a busy host still makes progress.
+            while self.running > 0 and (reason := self._blocking_reason()):
+                wait = POLL_INTERVAL_SECONDS
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        logger.warning(f"Solve ran out of time waiting for admission: {reason}")
+                        raise SolverTimeoutError(deadline - start)
+                    wait = min(wait, remaining)
+                logger.info(f"Queueing solve until the host has headroom: {reason}")
+                self._condition.wait(wait)
+            self.running += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.running -= 1
+                self._condition.notify_all()
@@ -0,0 +1,201 @@
+import os
+import queue
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+import docker
+from docker.models.containers import Container
+from loguru import logger
+
+from src.utils.tracing import traced
+
+CONTAINER_WORKSPACE_ROOT = "/workspaces"
+POOL_LABEL = "minimal-provider-agent-market.pool"
+
+
+@dataclass
+class PooledContainer:
+    container: Container
+    slot: str
+    cache_directory: str
+    workspace_directory: str
+
+
+class ContainerPool:
+    """Idle solver containers started ahead of time and handed out one job each.
+
+    Containers run ``sleep infinity`` with only their slot's directory under the
+    workspace root mounted, so a solver never sees another job's checkout (or the
+    token in its git config). A job acquires the container before cloning into
+    that directory and runs one exec in it. Used containers are removed, their
+    slot directory is wiped and the slot is refilled in the background, which
+    keeps every job on a clean container without paying the start-up cost on the
+    critical path.
+    """
+
+    def __init__(
+        self,
+        docker_client: docker.DockerClient,
+        image: str,
+        size: int,
+        workspace_root: str,
+        cache_root: str,
+        environment: dict[str, str],
+        resource_limits: Optional[dict] = None,
+    ) -> None:
+        self.docker_client = docker_client
+        self.image = image
+        self.size = size
+        self.workspace_root = os.path.abspath(workspace_root)
+        self.cache_root = cache_root
+        self.environment = environment
+        self.resource_limits = resource_limits or {}
+        self._idle: queue.Queue[PooledContainer] = queue.Queue()
+        self._closed = threading.Event()
+        self._image_ready = threading.Event()
+
+    def container_path(self, pooled: PooledContainer, host_path: str) -> str:
+        relative_path = os.path.relpath(os.path.abspath(host_path), pooled.workspace_directory)
+        if relative_path.startswith(os.pardir):
+            raise ValueError(
+                f"{host_path} is not inside the workspace of slot {pooled.slot}: "
+                f"{pooled.workspace_directory}"
+            )
+        return f"{CONTAINER_WORKSPACE_ROOT}/{relative_path}"
+
+    @traced("docker.create_container")
+    def _create(self, slot: str) -> PooledContainer:
+        cache_directory = os.path.join(self.cache_root, slot)
+        workspace_directory = os.path.join(self.workspace_root, slot)
+        os.makedirs(cache_directory, exist_ok=True)
+        os.makedirs(workspace_directory, exist_ok=True)
+        container = self.docker_client.containers.run(
+            self.image,
+            entrypoint=["sleep", "infinity"],
+            user=f"{os.getuid()}:{os.getgid()}",
+            volumes={
+                workspace_directory: {"bind": CONTAINER_WORKSPACE_ROOT, "mode": "rw"},
+                cache_directory: {"bind": "/home/ubuntu", "mode": "rw"},
+            },
+            environment=self.environment,
+            labels={POOL_LABEL: slot},
+            detach=True,
+            **self.resource_limits,
+        )
+        logger.info(f"Started solver container {container.short_id} for slot {slot}")
+        return PooledContainer(
+            container=container,
+            slot=slot,
+            cache_directory=cache_directory,
+            workspace_directory=workspace_directory,
+        )
+
+    def _fill_slot(self, slot: str) -> None:
+        if self._closed.is_set():
+            return
+        try:
+            self._idle.put(self._create(slot))
+        except Exception as e:
+            logger.error(f"Could not start pooled container for slot {slot}: {e}")
+
+    def _warm_up(self) -> None:
+        try:
+            self.docker_client.images.pull(self.image)
+            logger.info(f"Pulled image {self.image}")
+        except docker.errors.APIError as e:
+            logger.warning(f"Could not pull {self.image}, relying on the local image: {e}")
+        finally:
+            self._image_ready.set()
+        for index in range(self.size):
+            threading.Thread(target=self._fill_slot, args=(f"pool_{index}",), daemon=True).start()
+
+    def start(self) -> None:
+        """Pull the image and fill the slots in the background; returns immediately.
+
+        Pulling a multi-GB image must not hold up the caller, which may be about to
+        scan the market. Only ``acquire`` waits for the pull to finish.
+        """
+        threading.Thread(target=self._warm_up, name="container_pool_warm_up", daemon=True).start()
+
+    @traced("docker.acquire_container")
+    def acquire(self) -> PooledContainer:
+        if not self._image_ready.is_set():
+            logger.info(f"Waiting for {self.image} to be pulled")
+            self._image_ready.wait()
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                logger.info("No warm solver container available, starting one")
+                return self._create(f"overflow_{uuid.uuid4().hex[:8]}")
+            try:
+                pooled.container.reload()
+                if pooled.container.status == "running":
+                    return pooled
+            except docker.errors.NotFound:
+                pass
+            logger.warning(f"Discarding dead pooled container in slot {pooled.slot}")
+            self._refill(pooled.slot)
+
+    def _refill(self, slot: str) -> None:
+        if slot.startswith("pool_"):
+            threading.Thread(target=self._fill_slot, args=(slot,), daemon=True).start()
+
+    @traced("docker.release_container")
+    def release(self, pooled: PooledContainer) -> None:
+        _remove_container(pooled.container)
+        # Nothing a solver left behind may reach the next job in this slot.
+        shutil.rmtree(pooled.workspace_directory, ignore_errors=True)
+        if pooled.slot.startswith("overflow_"):
+            shutil.rmtree(pooled.cache_directory, ignore_errors=True)
+        self._refill(pooled.slot)
+
+    def shutdown(self) -> None:
+        self._closed.set()
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _remove_container(pooled.container)
+
+
+def _remove_container(container: Container) -> None:
+    try:
+        container.remove(force=True)
+        logger.info(f"Container {container.short_id} removed")
+    except docker.errors.NotFound:
+        pass
+    except docker.errors.APIError as e:
+        logger.warning(f"Could not remove container {container.short_id}: {e}")
+
+
+_pool: Optional[ContainerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_container_pool(
+    image: str,
+    size: int,
+    workspace_root: str,
+    cache_root: str,
+    environment: dict[str, str],
+    resource_limits: Optional[dict] = None,
+) -> ContainerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ContainerPool(
+                docker.from_env(),
+                image,
+                size,
+                workspace_root,
+                cache_root,
+                environment,
+                resource_limits,
+            )
+            _pool.start()
+        return _pool
@@ -0,0 +1,133 @@
+import json
+import re
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional
+
+from loguru import logger
+
+README_FILES = ["README.md", "README.txt", "README.rst", "README"]
+README_MAX_DEPTH = 2
+SKIPPED_DIRECTORIES = {
+    "__pycache__",
+    "build",
+    "dist",
+    "node_modules",
+    "target",
+    "third_party",
+    "vendor",
+    "venv",
+}
+NPM_DEFAULT_TEST_SCRIPT = 'echo "Error: no test specified" && exit 1'
+MAKEFILE_TEST_TARGETS = ["test", "tests", "check"]
+
+
+def _read_text(path: Path) -> Optional[str]:
+    if not path.is_file():
+        return None
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")
+    except OSError as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return None
+
+
+def _from_makefile(root: Path) -> Optional[str]:
+    content = _read_text(root / "Makefile")
+    if content is None:
+        return None
+    for target in MAKEFILE_TEST_TARGETS:
+        if re.search(rf"^{target}\s*:", content, re.MULTILINE):
+            return f"make {target}"
+    return None
+
+
+def _from_package_json(root: Path) -> Optional[str]:
+    content = _read_text(root / "package.json")
+    if content is None:
+        return None
+    try:
+        scripts = json.loads(content).get("scripts") or {}
+    except (ValueError, AttributeError):
+        return None
+    test_script = scripts.get("test")
+    if not test_script or test_script.strip() == NPM_DEFAULT_TEST_SCRIPT:
+        return None
+    if (root / "pnpm-lock.yaml").is_file():
+        return "pnpm test"
+    if (root / "yarn.lock").is_file():
+        return "yarn test"
+    return "npm test"
+
+
+def _from_python_manifests(root: Path) -> Optional[str]:
+    if (root / "pytest.ini").is_file():
+        return "pytest"
+    pyproject = _read_text(root / "pyproject.toml") or ""
+    if "[tool.pytest.ini_options]" in pyproject:
+        return "pytest"
+    setup_cfg = _read_text(root / "setup.cfg") or ""
+    if "[tool:pytest]" in setup_cfg:
+        return "pytest"
+    tox_ini = _read_text(root / "tox.ini")
+    if tox_ini is not None:
+        return "pytest" if "[pytest]" in tox_ini else "tox"
+    return None
+
+
+def _from_cargo(root: Path) -> Optional[str]:
+    return "cargo test" if (root / "Cargo.toml").is_file() else None
+
+
+def _from_go_mod(root: Path) -> Optional[str]:
+    return "go test ./..." if (root / "go.mod").is_file() else None
+
+
+DETECTORS: list[Callable[[Path], Optional[str]]] = [
+    _from_makefile,
+    _from_package_json,
+    _from_python_manifests,
+    _from_cargo,
+    _from_go_mod,
+]
+
+
+def detect_test_command(repo_path: str) -> Optional[str]:
+    """Derive the test command from well-known manifests at the repository root."""
+    root = Path(repo_path)
+    for detector in DETECTORS:
+        command = detector(root)
+        if command:
+            logger.info(f"Detected test command {command!r} with {detector.__name__}")
+            return command
+    return None
+
+
+def _is_searchable_directory(path: Path) -> bool:
+    return (
+        path.is_dir()
+        and not path.is_symlink()
+        and not path.name.startswith(".")
+        and path.name not in SKIPPED_DIRECTORIES
+    )
+
+
+def find_readme(repo_path: str, max_depth: int = README_MAX_DEPTH) -> Optional[Path]:
+    """Breadth-first README search, so the root README wins over nested ones."""
+    queue = deque([(Path(repo_path), 0)])
+    while queue:
+        directory, depth = queue.popleft()
+        for name in README_FILES:
+            candidate = directory / name
+            if candidate.is_file():
+                return candidate
+        if depth >= max_depth:
+            continue
+        try:
+            subdirectories = sorted(
+                entry for entry in directory.iterdir() if _is_searchable_directory(entry)
+            )
+        except OSError:
+            continue
+        queue.extend((subdirectory, depth + 1) for subdirectory in subdirectories)
+    return None
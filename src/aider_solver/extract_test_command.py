@@ -1,37 +1,50 @@
+import functools
 import os
+from typing import Optional
 
-import openai
+import git
 from loguru import logger
 
-from src.config import SETTINGS
+from src.aider_solver.detect_test_command import detect_test_command, find_readme
+from src.config import get_settings
+from src.utils.disk_cache import DiskCache
+from src.utils.llm import chat_completion
+from src.utils.tracing import traced
 
-openai.api_key = SETTINGS.openai_api_key
 WEAK_MODEL = "gpt-4o-mini"
 
 
+@functools.lru_cache(maxsize=None)
+def _test_command_cache() -> DiskCache:
+    # Results are keyed by commit, so they never go stale; the TTL only bounds disk use.
+    return DiskCache(
+        os.path.join(get_settings().state_directory, "test_commands.sqlite3"),
+        ttl_seconds=30 * 24 * 3600,
+        max_entries=10_000,
+        name="test_command",
+    )
+
+
 def _get_readme_content(repo_path: str) -> str:
     logger.info(f"Searching for README files in the repository: {repo_path}")
-    readme_files = ["README.md", "README.txt", "README.rst", "README"]
-
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            if file in readme_files:
-                readme_path = os.path.join(root, file)
-                logger.info(f"README file found: {readme_path}")
-                try:
-                    with open(readme_path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        logger.debug(f"README content loaded successfully from {readme_path}")
-                        return content
-                except Exception as e:
-                    logger.error(f"Error reading README file {readme_path}: {e}")
-                    return ""
-    logger.warning("No README file found in the repository.")
-    return ""
+    readme_path = find_readme(repo_path)
+    if not readme_path:
+        logger.warning("No README file found in the repository.")
+        return ""
+
+    logger.info(f"README file found: {readme_path}")
+    try:
+        with open(readme_path, "r", encoding="utf-8") as f:
+            content = f.read()
+            logger.debug(f"README content loaded successfully from {readme_path}")
+            return content
+    except Exception as e:
+        logger.error(f"Error reading README file {readme_path}: {e}")
+        return ""
 
 
-def suggest_test_command(repo_path: str) -> str:
-    logger.info(f"Starting test command suggestion process for repo: {repo_path}")
+def _suggest_test_command_with_llm(repo_path: str) -> Optional[str]:
+    """Ask the LLM for a test command; None when the request failed and may be retried."""
     readme_content = _get_readme_content(repo_path)
 
     if not readme_content:
@@ -40,7 +53,7 @@ def suggest_test_command(repo_path: str) -> str:
 
     logger.info("Requesting OpenAI to generate a test command based on README content.")
     try:
-        response = openai.chat.completions.create(
+        command = chat_completion(
             model=WEAK_MODEL,
             messages=[
                 {
@@ -64,7 +77,6 @@ def suggest_test_command(repo_path: str) -> str:
                 },
             ],
         )
-        command = response.choices[0].message.content.strip()
         if command:
             logger.info(f"Test command successfully generated: {command}")
             return command
@@ -73,4 +85,33 @@ def suggest_test_command(repo_path: str) -> str:
             return ""
     except Exception as e:
         logger.error(f"Error during OpenAI API call: {e}")
+        return None
+
+
+def _head_commit(repo_path: str) -> str:
+    try:
+        return git.Repo(repo_path).head.commit.hexsha
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError, ValueError):
         return ""
+
+
+@traced("solver.suggest_test_command")
+def suggest_test_command(repo_path: str) -> str:
+    logger.info(f"Starting test command suggestion process for repo: {repo_path}")
+    commit = _head_commit(repo_path)
+    if commit:
+        cached = _test_command_cache().get(commit)
+        if cached is not None:
+            logger.info(f"Using cached test command for commit {commit}: {cached!r}")
+            return cached
+
+    command = detect_test_command(repo_path)
+    if command is None:
+        command = _suggest_test_command_with_llm(repo_path)
+        if command is None:
+            # A failed request says nothing about the commit, so it is not cached.
+            return ""
+
+    if commit:
+        _test_command_cache().set(commit, command)
+    return command
@@ -1,110 +1,204 @@
+import functools
 import os
 import shlex
-from docker import from_env as docker_from_env
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import IO, ContextManager, Iterator, Optional
+
 from dotenv import load_dotenv
 from loguru import logger
-import re
-import openai
-from src.config import SETTINGS
-import time
+
+from src.aider_solver.admission import AdmissionController
+from src.aider_solver.container_pool import ContainerPool, PooledContainer, get_container_pool
+from src.aider_solver.log_collector import LogCollector
+from src.aider_solver.summarize_logs import summarize_logs
+from src.aider_solver.watchdog import ContainerWatchdog, SolverTimeoutError
+from src.config import get_settings
+from src.utils.tracing import traced
 
 DOCKER_IMAGE = "paulgauthier/aider"
+AIDER_CACHE_ROOT = "/tmp/aider_cache"
 load_dotenv()
 ENV_VARS = {key: os.getenv(key) for key in os.environ.keys()}
-WEAK_MODEL = "gpt-4o-mini"
-openai.api_key = SETTINGS.openai_api_key
+
 
 def _clean_logs(logs: str) -> str:
-    anti_escape_logs = re.compile(r'\x1B[@-_][0-?]*[ -/]*[@-~]')
-    logs = anti_escape_logs.sub('', logs).split("Tokens:")[0]
+    settings = get_settings()
+    return summarize_logs(
+        logs,
+        token_budget=settings.log_summary_token_budget,
+        chunk_tokens=settings.log_summary_chunk_tokens,
+        timeout=settings.log_summary_timeout_seconds,
+    )
+
+
+def _container_resource_limits() -> dict:
+    settings = get_settings()
+    limits = {}
+    if settings.container_cpus:
+        limits["nano_cpus"] = int(settings.container_cpus * 1e9)
+    if settings.container_memory_mb:
+        limits["mem_limit"] = f"{settings.container_memory_mb}m"
+    if settings.container_pids_limit:
+        limits["pids_limit"] = settings.container_pids_limit
+    return limits
+
+
+def _container_pool() -> ContainerPool:
+    settings = get_settings()
+    return get_container_pool(
+        DOCKER_IMAGE,
+        settings.container_pool_size,
+        settings.workspace_root,
+        AIDER_CACHE_ROOT,
+        ENV_VARS,
+        _container_resource_limits(),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _admission_controller() -> AdmissionController:
+    settings = get_settings()
+    return AdmissionController(
+        disk_path=settings.workspace_root,
+        max_load_per_cpu=settings.admission_max_load_per_cpu,
+        min_available_memory_bytes=(
+            settings.admission_min_available_memory_mb + (settings.container_memory_mb or 0)
+        )
+        * 2**20,
+        min_free_disk_bytes=settings.admission_min_free_disk_mb * 2**20,
+    )
+
+
+def start_container_pool() -> None:
+    """Start pulling the solver image and warming up idle containers in the background."""
+    _container_pool()
+
+
+@dataclass
+class SolverWorkspace:
+    """A host directory to clone into, visible only to the container reserved for it."""
+
+    path: str
+    container: PooledContainer
+
 
-    prompt = """
-    Below are the raw logs from an AI coding assistant. Please rewrite these logs as a clear, 
-    concise message to a user, focusing on the important actions and changes made. Remove any 
-    technical artifacts, ANSI escape codes, and redundant information. Format the response 
-    in a user-friendly way.
+@contextmanager
+def solver_workspace() -> Iterator[SolverWorkspace]:
+    """Reserve a solver container and a fresh directory inside its mounted slot.
 
-    Raw logs:
-    {logs}
+    The container is released, and the slot wiped, when the block exits.
     """
-    
+    pool = _container_pool()
+    pooled = pool.acquire()
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that processes technical logs."},
-                {"role": "user", "content": prompt.format(logs=logs)}
-            ],
-        )
-        return response.choices[0].message.content.strip()
+        with tempfile.TemporaryDirectory(dir=pooled.workspace_directory) as path:
+            yield SolverWorkspace(path=path, container=pooled)
+    finally:
+        pool.release(pooled)
 
-    except Exception as e:
-        logger.error(f"Failed to process logs with GPT-4: {e}")
-        return logs
 
+@traced("solver.launch")
 def launch_container_with_repo_mounted(
-    repo_directory: str, model_name: str, instance_background: str, test_command: str, timeout: int = 60
-) -> None:
-    docker_client = docker_from_env()
-    
+    workspace: SolverWorkspace,
+    model_name: str,
+    instance_background: str,
+    test_command: str,
+    timeout: Optional[float] = None,
+) -> str:
+    """Run aider on the repository cloned into ``workspace`` and return a summary of its logs.
+
+    ``timeout`` defaults to ``SOLVER_TIMEOUT_SECONDS`` and also covers the time spent
+    waiting for admission. Raises SolverTimeoutError when the run overruns it.
+    """
+    if timeout is None:
+        timeout = get_settings().solver_timeout_seconds
+    deadline = time.monotonic() + timeout
+    pool = _container_pool()
+    workdir = pool.container_path(workspace.container, workspace.path)
+
     escaped_background = instance_background.replace("'", "'\"'\"'")
     escaped_test_command = shlex.quote(test_command) if test_command else ""
-    
+
     test_args_and_command = f' --test-command {escaped_test_command}' if test_command else ""
-    
-    entrypoint = [
+
+    command = [
         "/bin/bash",
         "-c",
         (f"source /venv/bin/activate && python modify_repo.py --model-name {shlex.quote(model_name)} "
         f"--instance-background '{escaped_background}'{test_args_and_command}")
     ]
-    
-    logger.info(f"Launching container with entrypoint: {entrypoint}")
-    try:
-        container = docker_client.containers.run(
-            DOCKER_IMAGE,
-            entrypoint=entrypoint,
-            user=f"{os.getuid()}:{os.getgid()}",
-            volumes={
-                f"{repo_directory}/.": {"bind": "/app", "mode": "rw"},
-                "/tmp/aider_cache": {"bind": "/home/ubuntu", "mode": "rw"},
-            },
-            environment=ENV_VARS,
-            detach=True,
-            tty=True,
-            stdin_open=True,
+
+    with _admission_controller().admit(deadline):
+        return _run_in_container(
+            pool, workspace.container, workdir, command, deadline - time.monotonic()
         )
-        logger.info("Container launched. Streaming logs...")
 
-        start_time = time.time()
-        for log in container.logs(stream=True, follow=True):
-            if time.time() - start_time > timeout:
-                logger.warning(f"Container execution timed out after {timeout} seconds")
-                container.stop()
-                break
-            try:    
-                print(log.decode('utf-8'), end='', flush=True)
-            except UnicodeDecodeError:
-                pass
 
-        logs = container.logs().decode("utf-8")
-        logs = _clean_logs(logs)
+def _spill_file(workdir: str) -> ContextManager[Optional[IO[str]]]:
+    settings = get_settings()
+    if not settings.solver_log_directory:
+        return nullcontext(None)
+    os.makedirs(settings.solver_log_directory, exist_ok=True)
+    log_name = f"{os.path.basename(workdir)}-{int(time.time())}.log"
+    return open(os.path.join(settings.solver_log_directory, log_name), "w", encoding="utf-8")
 
-        result = container.wait()
 
-        exit_status = result.get("StatusCode", -1)
-        logger.info(f"Container finished with exit code: {exit_status}")
+@traced("docker.run_solver")
+def _run_in_container(
+    pool: ContainerPool, pooled: PooledContainer, workdir: str, command: list[str], timeout: float
+) -> str:
+    if timeout <= 0:
+        raise SolverTimeoutError(timeout)
+    settings = get_settings()
+    docker_api = pool.docker_client.api
+    logger.info(f"Running solver in container {pooled.container.short_id} ({workdir}): {command}")
+    try:
+        with ContainerWatchdog(
+            pooled.container, timeout, settings.container_stop_grace_seconds
+        ) as watchdog:
+            exec_id = docker_api.exec_create(
+                pooled.container.id,
+                command,
+                workdir=workdir,
+                user=f"{os.getuid()}:{os.getgid()}",
+                environment=ENV_VARS,
+                tty=True,
+            )["Id"]
+            logger.info("Solver started. Streaming logs...")
+
+            with _spill_file(workdir) as spill_file:
+                collector = LogCollector(
+                    max_lines=settings.solver_log_max_lines,
+                    spill_file=spill_file,
+                    name=pooled.container.short_id,
+                )
+                try:
+                    for log in docker_api.exec_start(exec_id, stream=True, tty=True):
+                        collector.feed(log)
+                except Exception:
+                    # Tearing the container down breaks the stream; that is the timeout.
+                    if not watchdog.expired:
+                        raise
+                finally:
+                    collector.close()
 
-        container.remove()
-        logger.info("Container removed")
+        logger.info(f"Collected {collector.total_lines} log lines")
+        if watchdog.expired:
+            raise SolverTimeoutError(timeout, collector.text())
+
+        logs = _clean_logs(collector.text())
+
+        exit_status = docker_api.exec_inspect(exec_id).get("ExitCode")
+        logger.info(f"Container finished with exit code: {exit_status}")
 
         return logs
 
+    except SolverTimeoutError:
+        raise
+
     except Exception as e:
         logger.error(f"Container execution failed: {e}")
-        try:
-            container.stop()
-            container.remove()
-        except:
-            pass
-        raise
\ No newline at end of file
+        raise
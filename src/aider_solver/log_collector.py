@@ -0,0 +1,86 @@
+import codecs
+import queue
+import re
+import threading
+from collections import deque
+from typing import IO, Optional
+
+from loguru import logger
+
+ANSI_ESCAPE = re.compile(r"\x1B[@-_][0-?]*[ -/]*[@-~]")
+MAX_LINE_LENGTH = 64 * 1024
+FORWARD_QUEUE_SIZE = 10_000
+_STOP = object()
+
+
+class LogCollector:
+    """Single-pass collector for a container's raw log stream.
+
+    Chunks are decoded incrementally, split into lines and stripped of ANSI
+    escape codes. Only the last ``max_lines`` lines are kept in memory; when
+    ``spill_file`` is given every line is also appended to it. Lines are
+    forwarded to loguru from a background thread so a slow sink never stalls
+    the docker stream; once ``FORWARD_QUEUE_SIZE`` lines are waiting, further
+    lines are dropped from the log output (not from ``lines`` or the spill
+    file) and counted in ``dropped_lines``.
+    """
+
+    def __init__(
+        self, max_lines: int = 2000, spill_file: Optional[IO[str]] = None, name: str = "solver"
+    ) -> None:
+        self.lines: deque[str] = deque(maxlen=max_lines)
+        self.total_lines = 0
+        self.dropped_lines = 0
+        self.spill_file = spill_file
+        self.name = name
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+        self._forward_queue: queue.Queue = queue.Queue(maxsize=FORWARD_QUEUE_SIZE)
+        self._forwarder = threading.Thread(target=self._forward, daemon=True)
+        self._forwarder.start()
+
+    def _forward(self) -> None:
+        while (line := self._forward_queue.get()) is not _STOP:
+            logger.debug(f"[{self.name}] {line}")
+
+    def _add_line(self, line: str) -> None:
+        # Keep only what a terminal would show after carriage-return redraws.
+        line = ANSI_ESCAPE.sub("", line).rstrip("\r").split("\r")[-1]
+        self.lines.append(line)
+        self.total_lines += 1
+        if self.spill_file:
+            self.spill_file.write(line + "\n")
+        try:
+            self._forward_queue.put_nowait(line)
+        except queue.Full:
+            self.dropped_lines += 1
+
+    def feed(self, chunk: bytes) -> None:
+        text = self._partial + self._decoder.decode(chunk)
+        *complete_lines, self._partial = text.split("\n")
+        for line in complete_lines:
+            self._add_line(line)
+        if len(self._partial) > MAX_LINE_LENGTH:
+            self._add_line(self._partial)
+            self._partial = ""
+
+    def close(self) -> None:
+        text = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if text:
+            self._add_line(text)
+        try:
+            self._forward_queue.put(_STOP, timeout=5)
+        except queue.Full:
+            pass
+        self._forwarder.join(timeout=5)
+        if self.dropped_lines:
+            logger.warning(
+                f"[{self.name}] {self.dropped_lines} lines were not forwarded to the log "
+                "because it fell behind"
+            )
+        if self.spill_file:
+            self.spill_file.flush()
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
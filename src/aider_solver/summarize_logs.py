@@ -0,0 +1,138 @@
+import contextvars
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from loguru import logger
+
+from src.utils.llm import chat_completion
+from src.utils.tracing import traced
+
+WEAK_MODEL = "gpt-4o-mini"
+CHARS_PER_TOKEN = 4
+CONTEXT_LINES = 2
+REDUCE_TIME_SHARE = 1 / 3
+RELEVANT_LINE = re.compile(
+    r"Applied edit to|Commit [0-9a-f]{7}|Add(ed)? .* to the chat|"
+    r"\b(passed|failed|error|errors|FAILED|ERROR|Traceback|Exception|assert)\b",
+    re.IGNORECASE,
+)
+NOISE_LINE = re.compile(r"^\s*(Tokens:|Cost:|─+$)")
+
+MAP_PROMPT = """
+Below is an excerpt from the logs of an AI coding assistant. List the files it edited, the
+changes it made, and any test results or errors, as short bullet points. Omit anything else.
+
+Logs:
+{logs}
+"""
+
+REDUCE_PROMPT = """
+Below are notes taken from the logs of an AI coding assistant. Rewrite them as a clear,
+concise message to a user, focusing on the important actions and changes made. Format the
+response in a user-friendly way.
+
+Notes:
+{notes}
+"""
+
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful assistant that processes technical logs.",
+}
+
+
+def extract_relevant_sections(logs: str) -> str:
+    """Keep edited files, commits, test results and errors with a little context."""
+    lines = [line for line in logs.splitlines() if line.strip() and not NOISE_LINE.match(line)]
+    keep = set()
+    for index, line in enumerate(lines):
+        if RELEVANT_LINE.search(line):
+            keep.update(range(max(0, index - CONTEXT_LINES), index + CONTEXT_LINES + 1))
+    if not keep:
+        return "\n".join(lines)
+    return "\n".join(lines[index] for index in sorted(keep) if index < len(lines))
+
+
+def _chunks(text: str, chunk_tokens: int) -> list[str]:
+    chunk_chars = chunk_tokens * CHARS_PER_TOKEN
+    chunks, current, current_size = [], [], 0
+    for line in text.splitlines():
+        line = line[:chunk_chars]
+        if current and current_size + len(line) > chunk_chars:
+            chunks.append("\n".join(current))
+            current, current_size = [], 0
+        current.append(line)
+        current_size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _complete(prompt: str, timeout: float) -> str:
+    return chat_completion(
+        model=WEAK_MODEL,
+        messages=[SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
+        timeout=timeout,
+    )
+
+
+def _succeeded(future: Future) -> bool:
+    return future.done() and not future.cancelled() and future.exception() is None
+
+
+@traced("solver.summarize_logs")
+def summarize_logs(logs: str, token_budget: int, chunk_tokens: int, timeout: float) -> str:
+    """Summarize solver logs within a token budget and a wall-clock deadline.
+
+    Relevant sections are extracted locally first. If they still exceed one chunk
+    they are split, only the last ``token_budget // chunk_tokens`` chunks are kept,
+    each is condensed by the weak model in parallel (map) and the notes are merged
+    in one final call (reduce). Whatever is not done by the deadline falls back to
+    the locally extracted text, never to the raw log.
+    """
+    deadline = time.monotonic() + timeout
+    relevant = extract_relevant_sections(logs)
+    if not relevant:
+        return ""
+
+    chunks = _chunks(relevant, chunk_tokens)
+    max_chunks = max(1, token_budget // chunk_tokens)
+    if len(chunks) > max_chunks:
+        logger.info(f"Summarizing the last {max_chunks} of {len(chunks)} log chunks")
+        chunks = chunks[-max_chunks:]
+
+    try:
+        if len(chunks) == 1:
+            return _complete(REDUCE_PROMPT.format(notes=chunks[0]), timeout)
+
+        # Leave a share of the deadline for the reduce call.
+        map_deadline = deadline - timeout * REDUCE_TIME_SHARE
+        map_timeout = max(0.0, map_deadline - time.monotonic())
+        executor = ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix="log_summary")
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                _complete,
+                MAP_PROMPT.format(logs=chunk),
+                map_timeout,
+            )
+            for chunk in chunks
+        ]
+        wait(futures, timeout=map_timeout)
+        # Stragglers are not waited for; their requests end at the map deadline as well.
+        executor.shutdown(wait=False, cancel_futures=True)
+        notes = [
+            future.result() if _succeeded(future) else chunk
+            for chunk, future in zip(chunks, futures)
+        ]
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning("Log summary deadline reached before the reduce step")
+            return "\n".join(notes)
+        return _complete(REDUCE_PROMPT.format(notes="\n\n".join(notes)), remaining)
+
+    except Exception as e:
+        logger.error(f"Failed to summarize logs: {e}")
+        return "\n".join(chunks)
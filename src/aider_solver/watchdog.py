@@ -0,0 +1,66 @@
+import threading
+from typing import Optional
+
+import docker
+from docker.models.containers import Container
+from loguru import logger
+
+
+class SolverTimeoutError(TimeoutError):
+    """A solver run overran its deadline and its container was torn down."""
+
+    def __init__(self, timeout: float, logs: str = "") -> None:
+        super().__init__(f"Solver run exceeded its {timeout:.0f}s deadline")
+        self.timeout = timeout
+        self.logs = logs
+
+
+class ContainerWatchdog:
+    """Tears a container down once its deadline passes, whether or not it is logging.
+
+    The container is stopped with ``stop_grace`` seconds for a clean exit, killed
+    if it is still running and finally removed. Removing it also ends any exec
+    stream the solver thread is blocked on.
+    """
+
+    def __init__(self, container: Container, timeout: float, stop_grace: float = 10) -> None:
+        self.container = container
+        self.timeout = timeout
+        self.stop_grace = stop_grace
+        self._expired = threading.Event()
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def expired(self) -> bool:
+        return self._expired.is_set()
+
+    def __enter__(self) -> "ContainerWatchdog":
+        self._timer = threading.Timer(max(0.0, self.timeout), self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._timer.cancel()
+
+    def _expire(self) -> None:
+        self._expired.set()
+        short_id = self.container.short_id
+        logger.warning(f"Container {short_id} exceeded its {self.timeout:.0f}s deadline")
+        try:
+            self.container.stop(timeout=int(self.stop_grace))
+            self.container.reload()
+            if self.container.status == "running":
+                logger.warning(f"Container {short_id} ignored stop, killing it")
+                self.container.kill()
+        except docker.errors.NotFound:
+            return
+        except docker.errors.APIError as e:
+            logger.warning(f"Could not stop container {short_id}: {e}")
+        try:
+            self.container.remove(force=True)
+            logger.info(f"Container {short_id} removed after timeout")
+        except docker.errors.NotFound:
+            pass
+        except docker.errors.APIError as e:
+            logger.warning(f"Could not remove container {short_id}: {e}")
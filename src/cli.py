@@ -0,0 +1,129 @@
+"""Command line entry point: ``python -m src {scan,solve,run}``.
+
+Handlers and their SDKs are imported by the command that needs them, so a
+scan-only process never loads docker, aider, PyGithub or openai.
+"""
+
+import argparse
+import sys
+from typing import Optional, Sequence
+
+from loguru import logger
+
+from src.config import Settings, get_settings
+from src.scheduler import PeriodicJob, Scheduler
+
+SCAN_COMMANDS = ("scan", "run")
+SOLVE_COMMANDS = ("solve", "run")
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--once", action="store_true", help="Run a single iteration and exit instead of polling."
+    )
+    common.add_argument(
+        "--profile",
+        metavar="OUTPUT_PREFIX",
+        help="Profile a single iteration, write the results and exit.",
+    )
+
+    parser = argparse.ArgumentParser(prog="python -m src", description="Agent market provider")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("scan", parents=[common], help="Bid on open instances in the market.")
+    subparsers.add_parser(
+        "solve", parents=[common], help="Solve awarded instances and open pull requests."
+    )
+    subparsers.add_parser(
+        "run", parents=[common], help="Scan and solve as independent periodic jobs."
+    )
+    return parser.parse_args(argv)
+
+
+def run_tasks(command: str) -> None:
+    """Run one scan and/or solve iteration, as selected by ``command``."""
+    try:
+        if command in SCAN_COMMANDS:
+            from src.market_scan import market_scan_handler
+
+            logger.info("Starting market scan")
+            market_scan_handler()
+            logger.info("Market scan completed successfully")
+
+        if command in SOLVE_COMMANDS:
+            from src.solve_instances import solve_instances_handler
+
+            logger.info("Starting solve_instances")
+            solve_instances_handler()
+            logger.info("solve_instances completed successfully")
+
+    except Exception as e:
+        logger.exception("Error during execution: " f"{str(e)}")
+
+
+def profile_run_tasks(command: str, output_prefix: str) -> None:
+    """Run one iteration of ``command`` under the profilers."""
+    from src.utils.profiling import profile
+
+    logger.info(f"Profiling one {command} iteration into {output_prefix}.*")
+    with profile(output_prefix):
+        run_tasks(command)
+
+
+def _periodic_jobs(command: str, settings: Settings) -> list[PeriodicJob]:
+    jobs = []
+    if command in SCAN_COMMANDS:
+        from src.market_scan import market_scan_handler
+
+        jobs.append(
+            PeriodicJob(
+                name="market_scan",
+                func=market_scan_handler,
+                min_interval=settings.scan_min_interval_seconds,
+                max_interval=settings.scan_max_interval_seconds,
+            )
+        )
+    if command in SOLVE_COMMANDS:
+        from src.aider_solver import start_container_pool
+        from src.solve_instances import solve_instances_handler
+
+        try:
+            start_container_pool()
+        except Exception as e:
+            logger.error(f"Could not warm up solver containers: {e}")
+        jobs.append(
+            PeriodicJob(
+                name="solve_instances",
+                func=solve_instances_handler,
+                min_interval=settings.solve_min_interval_seconds,
+                max_interval=settings.solve_max_interval_seconds,
+            )
+        )
+    return jobs
+
+
+def serve(command: str) -> None:
+    """Poll the market with the jobs of ``command`` until interrupted."""
+    settings = get_settings()
+    logger.info(f"Starting application ({command})...")
+    if settings.metrics_port:
+        from src.utils.metrics import start_metrics_server
+
+        start_metrics_server(settings.metrics_port, settings.metrics_address)
+    Scheduler(_periodic_jobs(command, settings)).run_forever()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = _parse_args(argv)
+    try:
+        if args.profile:
+            profile_run_tasks(args.command, args.profile)
+        elif args.once:
+            run_tasks(args.command)
+        else:
+            serve(args.command)
+    except KeyboardInterrupt:
+        logger.info("Application stopped by user")
+    except Exception as e:
+        logger.exception("Fatal error in main loop: " f"{str(e)}")
+        sys.exit(1)
@@ -1,10 +1,13 @@
+import functools
 import os
+import socket
+from typing import Any, Optional
 
 from dotenv import load_dotenv
-from pydantic import Field
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings
 
-from src.enums import ModelName
+from src.enums import CloneStrategy, LeaseBackendType, ModelName
 
 load_dotenv()
 
@@ -15,6 +18,9 @@ class Settings(BaseSettings):
     github_pat: str = Field(..., description="The personal access token for GitHub.")
     github_username: str = Field(..., description="The GitHub username.")
     github_email: str = Field(..., description="The GitHub email.")
+    github_api_url: str = Field(
+        "https://api.github.com", description="The base URL of the GitHub REST API."
+    )
 
     market_url: str = Field("https://api.agent.market", description="The URL for the market.")
     market_api_key: str = Field(..., description="The API key for the market.")
@@ -31,8 +37,175 @@ class Settings(BaseSettings):
 
     max_bid: float = Field(0.01, gt=0, description="The maximum bid for a proposal.")
 
+    state_directory: str = Field(
+        ".state", description="The directory where persistent local state is kept."
+    )
+    node_id: str = Field(
+        default_factory=lambda: f"{socket.gethostname()}-{os.getpid()}",
+        description="The name this provider node claims work under.",
+    )
+    lease_backend: LeaseBackendType = Field(
+        LeaseBackendType.memory,
+        description="Where work claims are kept; use sqlite to share work between nodes.",
+    )
+    lease_database_path: Optional[str] = Field(
+        None, description="The shared SQLite lease file; defaults to the state directory."
+    )
+    lease_ttl_seconds: float = Field(
+        120, gt=0, description="How long a claim outlives its node's last heartbeat."
+    )
+    bid_lease_ttl_seconds: float = Field(
+        600, gt=0, description="How long other nodes leave an instance bid on by this node."
+    )
+    market_scan_incremental: bool = Field(
+        True, description="Only bid on instances not seen by a previous scan."
+    )
+    market_bid_rate_per_second: float = Field(
+        5, gt=0, description="The sustained rate of proposal creation requests."
+    )
+    market_bid_burst: int = Field(
+        5, gt=0, description="The number of proposal requests allowed in a burst."
+    )
+    market_bid_concurrency: int = Field(
+        4, gt=0, description="The most proposal requests in flight at once."
+    )
+    market_retry_attempts: int = Field(
+        4, gt=0, description="Attempts per market request on rate limits and transient errors."
+    )
+    market_retry_base_delay_seconds: float = Field(
+        1, gt=0, description="The first retry delay, doubled on every further attempt."
+    )
+    market_retry_max_delay_seconds: float = Field(
+        30, gt=0, description="The longest delay between retries, including Retry-After."
+    )
+
+    metrics_port: Optional[int] = Field(
+        9100, ge=0, description="The Prometheus metrics port; 0 or empty disables the endpoint."
+    )
+    metrics_address: str = Field(
+        "0.0.0.0", description="The address the Prometheus metrics endpoint listens on."
+    )
+
+    trace_file: Optional[str] = Field(
+        None, description="If set, tracing spans are appended to this file as JSON lines."
+    )
+
+    scan_min_interval_seconds: float = Field(
+        10, gt=0, description="The polling interval for market scans after activity."
+    )
+    scan_max_interval_seconds: float = Field(
+        120, gt=0, description="The longest polling interval for market scans when idle."
+    )
+    solve_min_interval_seconds: float = Field(
+        10, gt=0, description="The polling interval for awarded proposals after activity."
+    )
+    solve_max_interval_seconds: float = Field(
+        300, gt=0, description="The longest polling interval for awarded proposals when idle."
+    )
+
+    repo_cache_enabled: bool = Field(
+        True, description="Keep bare mirrors of upstream repositories to speed up clones."
+    )
+    repo_cache_max_bytes: int = Field(
+        10 * 1024**3, gt=0, description="The disk budget for repository mirrors."
+    )
+
+    clone_strategy: Optional[CloneStrategy] = Field(
+        None, description="Force a clone strategy instead of choosing one from the repo size."
+    )
+    clone_blobless_min_kb: int = Field(
+        200_000, gt=0, description="The repo size from which clones skip blobs until needed."
+    )
+    clone_shallow_min_kb: int = Field(
+        1_000_000, gt=0, description="The repo size from which clones only fetch the tip commit."
+    )
+    clone_sparse_paths: list[str] = Field(
+        [], description="The directories checked out by the sparse clone strategy; required by it."
+    )
+
+    fork_registry_ttl_seconds: float = Field(
+        7 * 24 * 3600, gt=0, description="How long a recorded fork is reused without re-forking."
+    )
+    fork_ready_timeout_seconds: float = Field(
+        60, gt=0, description="How long to wait for a newly created fork to become ready."
+    )
+
+    llm_cache_enabled: bool = Field(True, description="Reuse answers to identical LLM prompts.")
+    llm_cache_ttl_seconds: float = Field(
+        7 * 24 * 3600, gt=0, description="How long a cached LLM answer stays valid."
+    )
+    llm_cache_max_entries: int = Field(
+        10_000, gt=0, description="The number of LLM answers kept before LRU eviction."
+    )
+
+    solver_workers: int = Field(4, gt=0, description="The number of instances solved concurrently.")
+    market_prefetch_concurrency: int = Field(
+        8, gt=0, description="The number of awarded instances fetched from the market at once."
+    )
+    job_max_attempts: int = Field(
+        3, gt=0, description="How many times a failed instance is retried before it is skipped."
+    )
+    workspace_root: str = Field(
+        "/tmp/provider_workspaces",
+        description="The host directory holding one workspace per solver container slot.",
+    )
+    container_pool_size: int = Field(
+        2, ge=0, description="The number of idle solver containers kept ready."
+    )
+    container_cpus: Optional[float] = Field(
+        2.0, gt=0, description="The CPU quota of each solver container; empty for none."
+    )
+    container_memory_mb: Optional[int] = Field(
+        4096, gt=0, description="The memory limit of each solver container; empty for none."
+    )
+    container_pids_limit: Optional[int] = Field(
+        512, gt=0, description="The process limit of each solver container; empty for none."
+    )
+    solver_timeout_seconds: float = Field(
+        1800, gt=0, description="The wall-clock limit for one solver container run."
+    )
+    instance_timeout_seconds: float = Field(
+        3600, gt=0, description="The wall-clock limit for solving one instance end to end."
+    )
+    container_stop_grace_seconds: int = Field(
+        10, ge=0, description="How long a timed-out container may exit cleanly before a kill."
+    )
+    solver_log_max_lines: int = Field(
+        2000, gt=0, description="The number of trailing solver log lines kept for the summary."
+    )
+    solver_log_directory: Optional[str] = Field(
+        None, description="If set, full solver logs are also written to files in this directory."
+    )
+    log_summary_token_budget: int = Field(
+        8000, gt=0, description="The most log tokens sent to the model for a run summary."
+    )
+    log_summary_chunk_tokens: int = Field(
+        2000, gt=0, description="The size of each log chunk summarized in parallel."
+    )
+    log_summary_timeout_seconds: float = Field(
+        60, gt=0, description="The wall-clock limit for summarizing a run's logs."
+    )
+    admission_max_load_per_cpu: float = Field(
+        1.0, gt=0, description="The 1-minute load per CPU above which new solves wait."
+    )
+    admission_min_available_memory_mb: int = Field(
+        1024, ge=0, description="The memory that must stay available besides a new container."
+    )
+    admission_min_free_disk_mb: int = Field(
+        2048, ge=0, description="The free disk space under the workspace root needed to solve."
+    )
+
     class Config:
         case_sensitive = False
+        # ``METRICS_PORT=`` or ``CONTAINER_CPUS=`` unset an optional setting.
+        env_parse_none_str = ""
+
+    @model_validator(mode="after")
+    def _check_sparse_paths(self) -> "Settings":
+        # Without paths a sparse checkout only contains the files at the repo root.
+        if self.clone_strategy == CloneStrategy.sparse and not self.clone_sparse_paths:
+            raise ValueError("CLONE_STRATEGY=sparse requires CLONE_SPARSE_PATHS")
+        return self
 
     @classmethod
     def load_settings(cls) -> "Settings":
@@ -48,4 +221,14 @@ class Settings(BaseSettings):
         return cls()
 
 
-SETTINGS = Settings.load_settings()
+@functools.lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Load the settings on first use, so importing a module does not require them."""
+    return Settings.load_settings()
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps ``from src.config import SETTINGS`` working without loading at import time.
+    if name == "SETTINGS":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
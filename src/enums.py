@@ -3,3 +3,32 @@ from enum import Enum
 
 class ModelName(str, Enum):
     gpt_4o = "gpt-4o"
+
+
+class CloneStrategy(str, Enum):
+    full = "full"
+    blobless = "blobless"
+    shallow = "shallow"
+    sparse = "sparse"
+
+
+class JobStatus(str, Enum):
+    awarded = "awarded"
+    cloning = "cloning"
+    running = "running"
+    pushed = "pushed"
+    pr_opened = "pr_opened"
+    messaged = "messaged"
+    failed = "failed"
+
+
+class BidOutcome(str, Enum):
+    created = "created"
+    skipped = "skipped"
+    claimed = "claimed"
+    failed = "failed"
+
+
+class LeaseBackendType(str, Enum):
+    memory = "memory"
+    sqlite = "sqlite"
@@ -1,71 +1,168 @@
 import asyncio
+import os
+from collections import Counter
 
-import httpx
 from loguru import logger
 
 from src import utils
-from src.config import SETTINGS, Settings
-
-TIMEOUT = httpx.Timeout(10.0)
-
-
-async def _create_proposal_for_instance(instance: dict, settings: Settings) -> None:
-    instance_id = instance["id"]
-    if not utils.find_github_repo_url(instance["background"]):
-        logger.info("Instance id {} does not have a github repo url", instance_id)
-        return
-
-    logger.info("Creating proposal for instance id: {}", instance_id)
-
-    headers = {
-        "x-api-key": settings.market_api_key,
-        "Accept": "application/json",
-    }
-    url = f"{settings.market_url}/v1/proposals/create/for-instance/{instance_id}"
-    data = {
-        "max_bid": settings.max_bid,
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(url, headers=headers, json=data)
-
-    response.raise_for_status()
-    logger.info(f"Proposal for instance id {instance_id} created successfully")
-
-
-async def async_market_scan_handler() -> None:
-    headers = {
-        "x-api-key": SETTINGS.market_api_key,
-        "Accept": "application/json",
-    }
-    url = f"{SETTINGS.market_url}/v1/instances/"
-    params = {"instance_status": SETTINGS.market_open_instance_code}
-
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        response = await client.get(url, headers=headers, params=params)
-
-    response.raise_for_status()
-    open_instances = response.json()
+from src.config import Settings, get_settings
+from src.enums import BidOutcome
+from src.utils.leases import get_lease_manager
+from src.utils.market_client import AsyncMarketClient
+from src.utils.metrics import BIDS
+from src.utils.rate_limit import AsyncTokenBucket, retry_async
+from src.utils.seen_instances import SeenInstanceIndex
+from src.utils.tracing import span, traced
+
+SEEN_INSTANCES_FILENAME = "seen_instances.json"
+
+# Outcomes that leave an instance to be looked at again by the next scan: the bid
+# failed, or another node claimed it and may still give up without bidding.
+UNSETTLED_OUTCOMES = (BidOutcome.failed, BidOutcome.claimed)
+
+
+class ProposalSubmitter:
+    """Creates proposals under a rate limit and a concurrency cap, retrying transient errors.
+
+    A failed bid is logged and reported as an outcome instead of raised, so it
+    never cancels the other bids of the same scan.
+    """
+
+    def __init__(self, client: AsyncMarketClient, settings: Settings) -> None:
+        self.client = client
+        self.settings = settings
+        self._leases = get_lease_manager(settings)
+        self._bucket = AsyncTokenBucket(
+            settings.market_bid_rate_per_second, settings.market_bid_burst
+        )
+        self._semaphore = asyncio.Semaphore(settings.market_bid_concurrency)
+
+    async def _create_proposal(self, instance_id: str) -> None:
+        async with self._semaphore:
+            await self._bucket.acquire()
+            await self.client.create_proposal(instance_id, self.settings.max_bid)
+
+    async def submit(self, instance: dict) -> BidOutcome:
+        instance_id = instance["id"]
+        with span("market_scan.bid", instance_id=instance_id) as current:
+            outcome = await self._submit(instance_id, instance["background"])
+            if current:
+                current.set_attribute("outcome", outcome.value)
+            return outcome
+
+    async def _submit(self, instance_id: str, background: str) -> BidOutcome:
+        if not utils.find_github_repo_url(background):
+            logger.info("Instance id {} does not have a github repo url", instance_id)
+            return BidOutcome.skipped
+
+        # The claim is kept after a successful bid so other nodes leave the instance alone
+        # until the shared proposal listing shows it.
+        bid_key = f"bid:{instance_id}"
+        if not self._leases.try_acquire(bid_key, self.settings.bid_lease_ttl_seconds):
+            logger.info(f"Instance id {instance_id} is being bid on by another node")
+            return BidOutcome.claimed
+
+        logger.info("Creating proposal for instance id: {}", instance_id)
+        try:
+            await retry_async(
+                lambda: self._create_proposal(instance_id),
+                self.settings.market_retry_attempts,
+                self.settings.market_retry_base_delay_seconds,
+                self.settings.market_retry_max_delay_seconds,
+            )
+        except Exception as e:
+            logger.error(f"Could not create proposal for instance id {instance_id}: {e}")
+            self._leases.release(bid_key)
+            return BidOutcome.failed
+        logger.info(f"Proposal for instance id {instance_id} created successfully")
+        return BidOutcome.created
+
+
+def _log_outcomes(outcomes: list[BidOutcome]) -> None:
+    if outcomes:
+        for outcome in outcomes:
+            BIDS.labels(outcome=outcome.value).inc()
+        counts = Counter(outcome.value for outcome in outcomes)
+        logger.info(f"Bid outcomes: {dict(counts)}")
+
+
+async def _full_scan(client: AsyncMarketClient, settings: Settings) -> int:
+    open_instances = await client.get_open_instances()
 
     if not open_instances:
         logger.debug("No open instances found")
-        return
+        return 0
 
     logger.debug(f"Found {len(open_instances)} open instances")
-    url = f"{SETTINGS.market_url}/v1/proposals/"
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        response = await client.get(url, headers=headers)
-
-    response.raise_for_status()
-    proposals = response.json()
+    proposals = await client.get_proposals()
 
     filled_instances = set(proposal["instance_id"] for proposal in proposals)
-    tasks = [
-        _create_proposal_for_instance(instance, SETTINGS)
-        for instance in open_instances
-        if instance["id"] not in filled_instances
-    ]
-    await asyncio.gather(*tasks)
-
+    submitter = ProposalSubmitter(client, settings)
+    outcomes = await asyncio.gather(
+        *(
+            submitter.submit(instance)
+            for instance in open_instances
+            if instance["id"] not in filled_instances
+        )
+    )
+    _log_outcomes(outcomes)
+    return len(outcomes)
+
+
+async def _incremental_scan(client: AsyncMarketClient, settings: Settings) -> int:
+    index = SeenInstanceIndex(os.path.join(settings.state_directory, SEEN_INSTANCES_FILENAME))
+    open_instances, validators = await client.get_open_instances_if_changed(index.validators)
+    if open_instances is None:
+        logger.debug("Open instances unchanged since last scan")
+        return 0
+
+    index.retain(instance["id"] for instance in open_instances)
+    new_instances = [instance for instance in open_instances if instance["id"] not in index]
+    if not new_instances:
+        logger.debug(f"No new open instances among {len(open_instances)}")
+        index.validators = validators
+        index.save()
+        return 0
+
+    logger.debug(f"Found {len(new_instances)} new of {len(open_instances)} open instances")
+    proposals = await client.get_proposals()
 
-def market_scan_handler() -> None:
-    asyncio.run(async_market_scan_handler())
+    filled_instances = set(proposal["instance_id"] for proposal in proposals)
+    submitter = ProposalSubmitter(client, settings)
+
+    async def bid(instance: dict) -> BidOutcome:
+        outcome = await submitter.submit(instance)
+        if outcome not in UNSETTLED_OUTCOMES:
+            index.add(instance["id"])
+        return outcome
+
+    try:
+        tasks = []
+        for instance in new_instances:
+            if instance["id"] in filled_instances:
+                index.add(instance["id"])
+            else:
+                tasks.append(bid(instance))
+        outcomes = await asyncio.gather(*tasks)
+        _log_outcomes(outcomes)
+        # Only trust the validators once every new instance has been handled,
+        # otherwise a 304 on the next scan would hide the unsettled bids.
+        if not any(outcome in UNSETTLED_OUTCOMES for outcome in outcomes):
+            index.validators = validators
+    finally:
+        index.save()
+    return len(new_instances)
+
+
+@traced("market_scan")
+async def async_market_scan_handler() -> int:
+    """Bid on open instances and return how many new instances were considered."""
+    settings = get_settings()
+    async with AsyncMarketClient(settings) as client:
+        if settings.market_scan_incremental:
+            return await _incremental_scan(client, settings)
+        return await _full_scan(client, settings)
+
+
+def market_scan_handler() -> int:
+    return asyncio.run(async_market_scan_handler())
@@ -0,0 +1,75 @@
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+from loguru import logger
+
+
+@dataclass
+class PeriodicJob:
+    """A job run repeatedly on its own thread with an adaptive interval.
+
+    ``func`` returns True when the run found something to do. Active runs reset
+    the interval to ``min_interval``; idle or failed runs multiply it by
+    ``backoff_factor`` up to ``max_interval``. Every sleep is jittered by
+    ``±jitter`` so replicas and jobs do not poll in lockstep.
+    """
+
+    name: str
+    func: Callable[[], bool]
+    min_interval: float
+    max_interval: float
+    backoff_factor: float = 2.0
+    jitter: float = 0.2
+    interval: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.interval = self.min_interval
+
+    def run_once(self) -> None:
+        try:
+            active = bool(self.func())
+        except Exception as e:
+            logger.exception(f"Error during {self.name}: {e}")
+            active = False
+
+        if active:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff_factor, self.max_interval)
+
+    def next_delay(self) -> float:
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class Scheduler:
+    """Runs each PeriodicJob independently so a slow job never delays another."""
+
+    def __init__(self, jobs: list[PeriodicJob]) -> None:
+        self.jobs = jobs
+        self._stop = threading.Event()
+
+    def _run_job(self, job: PeriodicJob) -> None:
+        while not self._stop.is_set():
+            logger.info(f"Starting {job.name}")
+            job.run_once()
+            delay = job.next_delay()
+            logger.info(f"Next {job.name} in {delay:.1f} seconds")
+            self._stop.wait(delay)
+
+    def run_forever(self) -> None:
+        threads = [
+            threading.Thread(target=self._run_job, args=(job,), name=job.name, daemon=True)
+            for job in self.jobs
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                self._stop.wait(1.0)
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self._stop.set()
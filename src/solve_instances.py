@@ -1,59 +1,160 @@
+import asyncio
+import contextvars
 import os
-import tempfile
-from pathlib import Path
-from typing import Optional
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+from pathlib import Path
+from typing import ContextManager, Optional
 
-import httpx
 from loguru import logger
 
 from src import aider_solver, utils
-from src.config import SETTINGS, Settings
+from src.config import Settings, get_settings
+from src.enums import CloneStrategy, JobStatus
+from src.utils.awarded_proposals import AwardedProposalIndex
+from src.utils.fork_registry import get_fork_registry
+from src.utils.job_store import JobStore
+from src.utils.leases import Lease, LeaseManager, get_lease_manager
+from src.utils.market_client import AsyncMarketClient, MarketClient, get_market_client
+from src.utils.metrics import SOLVE_OUTCOMES, SOLVES_IN_PROGRESS, time_stage
+from src.utils.repo_cache import RepoMirrorCache
+from src.utils.tracing import span, traced
+
+MIRRORS_DIRNAME = "mirrors"
+FORK_REGISTRY_FILENAME = "forks.json"
+AWARDED_PROPOSALS_FILENAME = "awarded_proposals.json"
+JOB_STORE_FILENAME = "jobs.sqlite3"
+# Proposals older than this are not solved any more.
+AWARDED_PROPOSAL_WINDOW = timedelta(days=1)
+
+_PR_METADATA_EXECUTOR = ThreadPoolExecutor(thread_name_prefix="pr_metadata")
+
+
+async def _get_instance_to_solve(
+    instance_id: str, client: AsyncMarketClient, jobs: JobStore
+) -> Optional[dict]:
+    instance, chat = await asyncio.gather(
+        client.get_instance(instance_id), client.get_chat(instance_id)
+    )
+    if instance["status"] != client.settings.market_resolved_instance_code:
+        return None
+
+    if chat:
+        logger.info(f"Instance id {instance_id} has chat messages. Skipping solving.")
+        jobs.transition(instance_id, JobStatus.messaged)
+        return None
+
+    return instance
+
 
-TIMEOUT = httpx.Timeout(10.0)
+@traced("prefetch_instances")
+async def _prefetch_instances_to_solve(
+    instance_ids: list[str], jobs: JobStore, settings: Settings
+) -> list[dict]:
+    """Fetch instance and chat for every candidate concurrently, keeping the solvable ones."""
+    semaphore = asyncio.Semaphore(settings.market_prefetch_concurrency)
 
+    async with AsyncMarketClient(settings) as client:
 
-def _get_instance_to_solve(instance_id: str, settings: Settings) -> Optional[dict]:
-    headers = {
-        "x-api-key": settings.market_api_key,
-    }
-    with httpx.Client(timeout=TIMEOUT) as client:
-        instance_url = f"{settings.market_url}/v1/instances/{instance_id}"
-        response = client.get(instance_url, headers=headers)
-        instance = response.json()
+        async def fetch(instance_id: str) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    return await _get_instance_to_solve(instance_id, client, jobs)
+                except Exception as e:
+                    logger.error(f"Error fetching instance id {instance_id}: {e}")
+                    return None
 
-        if instance["status"] != settings.market_resolved_instance_code:
-            return None
+        instances = await asyncio.gather(*(fetch(instance_id) for instance_id in instance_ids))
+    return [instance for instance in instances if instance]
 
-    with httpx.Client(timeout=TIMEOUT) as client:
-        chat_url = f"{settings.market_url}/v1/chat/{instance_id}"
-        response = client.get(chat_url, headers=headers)
 
-        chat = response.json()
-        if chat:
-            logger.info(f"Instance id {instance_id} has chat messages. Skipping solving.")
-            return None
+def _clone_reference(repo_url: str, settings: Settings) -> ContextManager[Optional[str]]:
+    if not settings.repo_cache_enabled:
+        return nullcontext(None)
+    mirror_cache = RepoMirrorCache(
+        os.path.join(settings.state_directory, MIRRORS_DIRNAME), settings.repo_cache_max_bytes
+    )
+    return mirror_cache.reference(repo_url)
 
-        return instance
 
+def _clone_strategy(repo_url: str, settings: Settings) -> CloneStrategy:
+    if settings.clone_strategy:
+        return settings.clone_strategy
+    size_kb = utils.get_repository_size_kb(repo_url, settings.github_pat)
+    return utils.select_clone_strategy(
+        size_kb, settings.clone_blobless_min_kb, settings.clone_shallow_min_kb
+    )
 
-def _solve_instance(instance_id: str, instance_background: str, settings: Settings) -> None:
+
+def _pr_metadata_result(future: Future) -> Optional[utils.PullRequestMetadata]:
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning(f"Could not generate PR metadata, using defaults: {e}")
+        return None
+
+
+def _job_store(settings: Settings) -> JobStore:
+    return JobStore(
+        os.path.join(settings.state_directory, JOB_STORE_FILENAME), settings.job_max_attempts
+    )
+
+
+def _solve_instance(
+    instance_id: str,
+    instance_background: str,
+    settings: Settings,
+    jobs: JobStore,
+    lease: Lease,
+) -> Optional[str]:
     logger.info("Solving instance id: {}", instance_id)
+    deadline = time.monotonic() + settings.instance_timeout_seconds
     target_repo_url = utils.find_github_repo_url(instance_background)
     instance_background = utils.remove_all_urls(instance_background)
     if not target_repo_url:
         logger.info(f"Instance id {instance_id} does not have a github repo url")
+        SOLVE_OUTCOMES.labels(outcome="no_repo_url").inc()
         return
 
-    forked_repo_url = utils.fork_repo(target_repo_url, settings.github_pat)
+    jobs.transition(instance_id, JobStatus.cloning)
+    # Generated while the fork, clone and container run so it is ready after the push.
+    pr_metadata_future = _PR_METADATA_EXECUTOR.submit(
+        contextvars.copy_context().run, utils.get_pr_metadata, instance_background
+    )
+
+    with time_stage("fork"):
+        forked_repo_url = utils.fork_repo(
+            target_repo_url,
+            settings.github_pat,
+            registry=get_fork_registry(
+                os.path.join(settings.state_directory, FORK_REGISTRY_FILENAME),
+                settings.fork_registry_ttl_seconds,
+            ),
+            ready_timeout=settings.fork_ready_timeout_seconds,
+        )
     logger.info(f"Forked repo url: {forked_repo_url}")
     forked_repo_name = utils.extract_repo_name_from_url(forked_repo_url)
-    with tempfile.TemporaryDirectory() as temp_dir:
-        repo_absolute_path = Path(temp_dir)
+    # The container is reserved first so the clone lands in the only directory it can see.
+    with aider_solver.solver_workspace() as workspace:
+        repo_absolute_path = Path(workspace.path)
         logger.info(f"Cloning repository {forked_repo_url} to {repo_absolute_path}")
         try:
-            utils.clone_repository(forked_repo_url, str(repo_absolute_path))
-            utils.create_and_push_branch(repo_absolute_path, instance_id, settings.github_pat)
+            strategy = _clone_strategy(target_repo_url, settings)
+            reference = nullcontext(None)
+            if strategy == CloneStrategy.full:
+                reference = _clone_reference(target_repo_url, settings)
+            with time_stage("clone"), reference as reference_path:
+                utils.clone_repository(
+                    forked_repo_url,
+                    str(repo_absolute_path),
+                    reference=reference_path,
+                    strategy=strategy,
+                    sparse_paths=settings.clone_sparse_paths,
+                )
+            with time_stage("branch_push"):
+                utils.create_and_push_branch(repo_absolute_path, instance_id, settings.github_pat)
             utils.set_git_config(
                 settings.github_username, settings.github_email, repo_absolute_path
             )
@@ -61,103 +162,192 @@ def _solve_instance(instance_id: str, instance_background: str, settings: Settin
             modify_repo_absolute_path = (
                 Path(os.path.dirname(os.path.abspath(__file__))) / "aider_solver" / "modify_repo.py"
             )
-            utils.copy_file_to_directory(modify_repo_absolute_path, repo_absolute_path)
-            utils.change_directory_ownership_recursive(repo_absolute_path, os.getuid(), os.getgid())
-            test_command = aider_solver.suggest_test_command(str(repo_absolute_path))
-            logs = aider_solver.launch_container_with_repo_mounted(
-                str(repo_absolute_path),
-                settings.foundation_model_name.value,
-                instance_background,
-                test_command,
-            )
+            with time_stage("prepare_workspace"):
+                utils.copy_file_to_directory(modify_repo_absolute_path, repo_absolute_path)
+                utils.change_directory_ownership_recursive(
+                    repo_absolute_path, os.getuid(), os.getgid()
+                )
+            with time_stage("test_command"):
+                test_command = aider_solver.suggest_test_command(str(repo_absolute_path))
+            jobs.transition(instance_id, JobStatus.running)
+            with time_stage("container_run"):
+                logs = aider_solver.launch_container_with_repo_mounted(
+                    workspace,
+                    settings.foundation_model_name.value,
+                    instance_background,
+                    test_command,
+                    timeout=min(settings.solver_timeout_seconds, deadline - time.monotonic()),
+                )
 
-            pushed = utils.push_commits(str(repo_absolute_path), settings.github_pat)
+            # Another node may have taken the instance over while the solver ran.
+            lease.ensure_held()
+            with time_stage("push"):
+                pushed = utils.push_commits(str(repo_absolute_path), settings.github_pat)
             if not pushed:
                 logger.info(f"No new commits to push for instance id {instance_id}")
+                SOLVE_OUTCOMES.labels(outcome="no_changes").inc()
                 return logs
+            jobs.transition(instance_id, JobStatus.pushed)
             target_repo_name = utils.extract_repo_name_from_url(target_repo_url)
             logger.info(
                 f"Creating pull request from source repo {forked_repo_name} "
                 f"to target repo {target_repo_name}"
             )
 
-            pr_title = utils.get_pr_title(instance_background)
-            pr_body = utils.get_pr_body(instance_background)
-
-            pr_url = utils.create_pull_request(
-                source_repo_name=forked_repo_name,
-                target_repo_name=target_repo_name,
-                source_repo_path=str(repo_absolute_path),
-                github_token=settings.github_pat,
-                pr_title=pr_title,
-                pr_body=pr_body,
-            )
+            with time_stage("pr_metadata"):
+                pr_metadata = _pr_metadata_result(pr_metadata_future)
+            with time_stage("pr_create"):
+                pr_url = utils.create_pull_request(
+                    source_repo_name=forked_repo_name,
+                    target_repo_name=target_repo_name,
+                    source_repo_path=str(repo_absolute_path),
+                    github_token=settings.github_pat,
+                    pr_title=pr_metadata.title if pr_metadata else None,
+                    pr_body=pr_metadata.body if pr_metadata else None,
+                )
 
+            jobs.transition(instance_id, JobStatus.pr_opened, pr_url=pr_url)
+            SOLVE_OUTCOMES.labels(outcome="pr_opened").inc()
             return f"Solved instance {instance_id} with PR {pr_url}"
 
+        except aider_solver.SolverTimeoutError:
+            raise
+
         except Exception as e:
             logger.error(f"Error while processing repository: {e}")
             raise
 
 
-def get_awarded_proposals(settings: Settings) -> list[dict]:
-    headers = {
-        "x-api-key": settings.market_api_key,
-    }
-    url = f"{settings.market_url}/v1/proposals/"
+def _listing_lower_bound(now: datetime) -> datetime:
+    """Start of the awarded-proposal query, floored so the URL (and its ETag) stay stable."""
+    return (now - AWARDED_PROPOSAL_WINDOW).replace(minute=0, second=0, microsecond=0)
+
 
-    response = httpx.get(url, headers=headers)
-    response.raise_for_status()
-    all_proposals = response.json()
+@traced("get_awarded_proposals")
+def get_awarded_proposals(client: MarketClient) -> list[dict]:
+    settings = client.settings
+    index = AwardedProposalIndex(os.path.join(settings.state_directory, AWARDED_PROPOSALS_FILENAME))
+    now = datetime.utcnow()
+    one_day_ago = now - AWARDED_PROPOSAL_WINDOW
+    created_after = _listing_lower_bound(now)
+    # Validators from a query with another lower bound say nothing about this one.
+    validators = index.validators if index.created_after == created_after.isoformat() else {}
 
-    current_time = datetime.utcnow()
-    one_day_ago = current_time - timedelta(days=1)
+    proposals, validators = client.get_proposals_if_changed(
+        validators, settings.market_awarded_proposal_code, created_after
+    )
+    if proposals is None:
+        logger.debug("Proposals unchanged since last cycle")
+        proposals = index.proposals
+    else:
+        index.proposals, index.validators = proposals, validators
+        index.created_after = created_after.isoformat()
+        index.save()
 
     awarded_proposals = [
-        p for p in all_proposals 
-        if p["status"] == settings.market_awarded_proposal_code
-        and datetime.fromisoformat(p["creation_date"]) > one_day_ago
+        p for p in proposals if datetime.fromisoformat(p["creation_date"]) > one_day_ago
     ]
     return awarded_proposals
 
 
-def _send_message(instance_id: str, message: str, settings: Settings) -> None:
-    headers = {
-        "x-api-key": settings.market_api_key,
-    }
-    url = f"{settings.market_url}/v1/chat/send-message/{instance_id}"
-    data = {"message": message}
+def _solve_and_notify(
+    instance: dict,
+    client: MarketClient,
+    settings: Settings,
+    jobs: JobStore,
+    leases: LeaseManager,
+) -> None:
+    instance_id = instance["id"]
+    with (
+        span("solve_instance", instance_id=instance_id),
+        leases.hold(f"solve:{instance_id}") as lease,
+    ):
+        if lease is None:
+            logger.info(f"Instance id {instance_id} is being solved by another node")
+            SOLVE_OUTCOMES.labels(outcome="claimed_elsewhere").inc()
+            return
+
+        jobs.start_attempt(instance_id)
+        job = jobs.get(instance_id)
+        try:
+            if job.pr_url:
+                # The PR is already open; solving again would fork, run and open a duplicate.
+                logger.info(f"Instance id {instance_id} already has PR {job.pr_url}")
+                message = f"Solved instance {instance_id} with PR {job.pr_url}"
+            else:
+                logger.info("Solving instance id: {}", instance_id)
+                with SOLVES_IN_PROGRESS.track_inprogress(), time_stage("total"):
+                    message = _solve_instance(
+                        instance_id,
+                        instance["background"],
+                        settings,
+                        jobs,
+                        lease,
+                    )
+        except aider_solver.SolverTimeoutError as e:
+            logger.warning(f"Timed out solving instance id {instance_id}: {e}")
+            SOLVE_OUTCOMES.labels(outcome="timed_out").inc()
+            jobs.transition(instance_id, JobStatus.failed, error=str(e))
+            return
+        except Exception as e:
+            logger.error(f"Error solving instance id {instance_id}: {e}")
+            SOLVE_OUTCOMES.labels(outcome="failed").inc()
+            jobs.transition(instance_id, JobStatus.failed, error=str(e))
+            return
 
-    response = httpx.post(url, headers=headers, json=data)
-    response.raise_for_status()
+        try:
+            client.send_message(instance_id, message)
+        except Exception as e:
+            logger.error(f"Error sending message for instance id {instance_id}: {e}")
+            jobs.transition(instance_id, JobStatus.failed, error=str(e))
+            return
+        jobs.transition(instance_id, JobStatus.messaged)
 
 
-def solve_instances_handler() -> None:
+@traced("solve_instances")
+def solve_instances_handler() -> int:
+    """Solve every pending awarded instance and return how many were attempted."""
     logger.info("Solve instances handler")
-    awarded_proposals = get_awarded_proposals(SETTINGS)
+    settings = get_settings()
+    client = get_market_client(settings)
+    jobs = _job_store(settings)
+    leases = get_lease_manager(settings)
+    awarded_proposals = get_awarded_proposals(client)
 
     logger.info(f"Found {len(awarded_proposals)} awarded proposals")
 
+    candidate_ids = []
     for p in awarded_proposals:
-        instance = _get_instance_to_solve(p["instance_id"], SETTINGS)
-        if not instance:
-            continue
+        jobs.record_awarded(p["instance_id"])
+        if not jobs.is_finished(p["instance_id"]):
+            candidate_ids.append(p["instance_id"])
 
-        logger.info("Solving instance id: {}", instance["id"])
-        try:
-            message = _solve_instance(
-                instance["id"],
-                instance["background"],
-                SETTINGS,
-            )
-        except Exception as e:
-            logger.error(f"Error solving instance id {instance['id']}: {e}")
-        else:
+    instances = []
+    if candidate_ids:
+        instances = asyncio.run(_prefetch_instances_to_solve(candidate_ids, jobs, settings))
+
+    if not instances:
+        return 0
+
+    logger.info(f"Solving {len(instances)} instances with up to {settings.solver_workers} workers")
+    with ThreadPoolExecutor(
+        max_workers=settings.solver_workers, thread_name_prefix="solver"
+    ) as executor:
+        futures = {
+            executor.submit(
+                contextvars.copy_context().run,
+                _solve_and_notify,
+                instance,
+                client,
+                settings,
+                jobs,
+                leases,
+            ): instance["id"]
+            for instance in instances
+        }
+        for future in as_completed(futures):
             try:
-                _send_message(
-                    instance["id"],
-                    message,
-                    SETTINGS,
-                )
+                future.result()
             except Exception as e:
-                logger.error(f"Error sending message for instance id {instance['id']}: {e}")
+                logger.error(f"Unexpected error in worker for instance id {futures[future]}: {e}")
+    return len(instances)
@@ -1,28 +1,37 @@
-from .agent_market import get_pr_body, get_pr_title, remove_all_urls
-from .file_utils import change_directory_ownership_recursive, copy_file_to_directory
-from .git import (
-    clone_repository,
-    create_and_push_branch,
-    create_pull_request,
-    extract_repo_name_from_url,
-    find_github_repo_url,
-    fork_repo,
-    push_commits,
-    set_git_config,
-)
+import importlib
+from typing import Any
 
-__all__ = [
-    "find_github_repo_url",
-    "clone_repository",
-    "fork_repo",
-    "push_commits",
-    "create_pull_request",
-    "extract_repo_name_from_url",
-    "get_pr_title",
-    "get_pr_body",
-    "remove_all_urls",
-    "set_git_config",
-    "create_and_push_branch",
-    "copy_file_to_directory",
-    "change_directory_ownership_recursive",
-]
+# Exports are resolved on first access (PEP 562), so importing one helper does not
+# pull in GitPython, PyGithub and openai for a process that never uses them.
+_EXPORTS = {
+    "find_github_repo_url": "github_urls",
+    "extract_repo_name_from_url": "github_urls",
+    "clone_repository": "git",
+    "fork_repo": "git",
+    "push_commits": "git",
+    "create_pull_request": "git",
+    "set_git_config": "git",
+    "create_and_push_branch": "git",
+    "get_repository_size_kb": "git",
+    "select_clone_strategy": "git",
+    "get_pr_metadata": "agent_market",
+    "PullRequestMetadata": "agent_market",
+    "remove_all_urls": "agent_market",
+    "copy_file_to_directory": "file_utils",
+    "change_directory_ownership_recursive": "file_utils",
+    "get_llm_cache_stats": "llm",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,60 +1,46 @@
 import re
 
-import openai
+from pydantic import BaseModel
 
-from src.config import SETTINGS
+from src.utils.llm import chat_completion
 
-openai.api_key = SETTINGS.openai_api_key
 WEAK_MODEL = "gpt-4o-mini"
 
 
-def get_pr_title(background: str) -> str:
-    response = openai.chat.completions.create(
-        model=WEAK_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are an assistant that helps generate concise, "
-                    "professional pull request titles."
-                ),
-            },
-            {
-                "role": "user",
-                "content": (
-                    "Based on the following background, "
-                    f"generate a pull request title: {background}"
-                ),
-            },
-        ],
-    )
-    return response.choices[0].message.content.strip()
+class PullRequestMetadata(BaseModel):
+    title: str
+    body: str
 
 
-def get_pr_body(background):
-    response = openai.chat.completions.create(
+def get_pr_metadata(background: str) -> PullRequestMetadata:
+    content = chat_completion(
         model=WEAK_MODEL,
         messages=[
             {
                 "role": "system",
                 "content": (
-                    "You are an assistant that helps generate detailed, "
-                    "clear, and professional pull request descriptions."
+                    "You are an assistant that helps generate concise, professional pull "
+                    "request titles and detailed, clear, and professional pull request "
+                    "descriptions. Answer with a JSON object with the keys "
+                    '"title" and "body".'
                 ),
             },
             {
                 "role": "user",
                 "content": (
                     "Based on the following background, "
-                    f"generate a pull request description: {background}"
+                    f"generate a pull request title and description: {background}"
                 ),
             },
         ],
+        response_format={"type": "json_object"},
+        # A malformed answer must not be cached, or retries would keep getting it.
+        validate=PullRequestMetadata.model_validate_json,
     )
-    return response.choices[0].message.content.strip()
+    return PullRequestMetadata.model_validate_json(content)
 
 
 def remove_all_urls(text: str) -> str:
     text = text.replace("Repository URL:", "")
     text = text.replace("Issue URL:", "")
-    return re.sub(r"https?:\/\/[^\s]+", "", text)
\ No newline at end of file
+    return re.sub(r"https?:\/\/[^\s]+", "", text)
@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+from typing import Optional
+
+from loguru import logger
+
+
+class AwardedProposalIndex:
+    """The last awarded-proposal listing and its validators, persisted between cycles.
+
+    ``created_after`` is the lower bound the listing was requested with. The
+    validators are only valid for that same query; while it is unchanged the
+    next cycle sends them and reuses the stored proposals on 304 Not Modified.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.proposals: list[dict] = []
+        self.validators: dict[str, str] = {}
+        self.created_after: Optional[str] = None
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable awarded-proposal index {self.path}: {e}")
+            return
+        self.proposals = data.get("proposals", [])
+        self.validators = data.get("validators", {})
+        self.created_after = data.get("created_after")
+
+    def save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        data = {
+            "proposals": self.proposals,
+            "validators": self.validators,
+            "created_after": self.created_after,
+        }
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as f:
+            json.dump(data, f)
+        os.replace(f.name, self.path)
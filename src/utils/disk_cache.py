@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from src.utils.metrics import count_cache_lookup
+
+
+class DiskCache:
+    """SQLite-backed string cache with a TTL and least-recently-used eviction.
+
+    Safe to share between threads and processes: every operation opens its own
+    connection and SQLite serialises the writes.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int, name: str = "disk") -> None:
+        self.path = path
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)"
+                )
+            self._initialized = True
+        return connection
+
+    def _count(self, hit: bool) -> None:
+        count_cache_lookup(self.name, hit)
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                row = connection.execute(
+                    "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._count(hit=True)
+                    return row[0]
+                if row:
+                    connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+        finally:
+            connection.close()
+        self._count(hit=False)
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                connection.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        finally:
+            connection.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._counter_lock:
+            return {"hits": self.hits, "misses": self.misses}
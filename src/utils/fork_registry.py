@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+
+class ForkEntry(BaseModel):
+    fork_full_name: str
+    clone_url: str
+    default_branch: str
+    recorded_at: float
+
+
+class ForkRegistry:
+    """Persistent upstream -> fork mapping so known forks skip the fork API calls."""
+
+    def __init__(self, path: str, ttl_seconds: float) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fork registry {self.path}: {e}")
+            return {}
+
+    def _write(self, entries: dict[str, dict]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as f:
+            json.dump(entries, f)
+        os.replace(f.name, self.path)
+
+    def get(self, upstream_full_name: str) -> Optional[ForkEntry]:
+        with self._lock:
+            data = self._read().get(upstream_full_name)
+        if not data:
+            return None
+        entry = ForkEntry(**data)
+        if time.time() - entry.recorded_at > self.ttl_seconds:
+            return None
+        return entry
+
+    def put(self, upstream_full_name: str, entry: ForkEntry) -> None:
+        with self._lock:
+            entries = self._read()
+            entries[upstream_full_name] = entry.model_dump()
+            self._write(entries)
+
+    def remove(self, upstream_full_name: str) -> None:
+        with self._lock:
+            entries = self._read()
+            if entries.pop(upstream_full_name, None) is not None:
+                self._write(entries)
+
+
+_registries: dict[str, ForkRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_fork_registry(path: str, ttl_seconds: float) -> ForkRegistry:
+    """Return the process-wide registry for ``path``, so its lock serializes every solver."""
+    key = os.path.abspath(path)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ForkRegistry(key, ttl_seconds)
+        return _registries[key]
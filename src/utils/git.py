@@ -1,41 +1,147 @@
 import os
-import re
 import shutil
 import time
-from typing import Optional
+from typing import Optional, Sequence
 
 import git
-import github
+import httpx
 from loguru import logger
 
+from src.enums import CloneStrategy
+from src.utils.fork_registry import ForkEntry, ForkRegistry
+from src.utils.github_api import get_github_api
+from src.utils.tracing import traced
 
-def find_github_repo_url(text: str) -> Optional[str]:
-    pattern = r"https://github.com/[^\s]+"
-    match = re.search(pattern, text)
-    if match:
-        return match.group(0)
-    return None
+CLONE_OPTIONS = {
+    CloneStrategy.full: [],
+    CloneStrategy.blobless: ["--filter=blob:none"],
+    CloneStrategy.shallow: ["--depth=1"],
+    CloneStrategy.sparse: ["--filter=blob:none", "--sparse"],
+}
 
 
-def clone_repository(repo_url: str, target_dir: str) -> None:
+def select_clone_strategy(
+    size_kb: Optional[int], blobless_min_kb: int, shallow_min_kb: int
+) -> CloneStrategy:
+    if size_kb is None or size_kb < blobless_min_kb:
+        return CloneStrategy.full
+    if size_kb < shallow_min_kb:
+        return CloneStrategy.blobless
+    return CloneStrategy.shallow
+
+
+@traced()
+def get_repository_size_kb(github_url: str, github_token: str) -> Optional[int]:
+    repo_path = github_url.replace("https://github.com/", "").removesuffix(".git")
+    try:
+        repo = get_github_api(github_token).get_repo(repo_path)
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not fetch repository size for {github_url}: {e}")
+        return None
+    return repo["size"] if repo else None
+
+
+@traced()
+def clone_repository(
+    repo_url: str,
+    target_dir: str,
+    reference: Optional[str] = None,
+    strategy: CloneStrategy = CloneStrategy.full,
+    sparse_paths: Sequence[str] = (),
+) -> None:
     if os.path.exists(target_dir):
         shutil.rmtree(target_dir)
 
     os.makedirs(target_dir)
-    git.Repo.clone_from(repo_url, target_dir)
-    logger.info(f"Cloned repository from {repo_url} to {target_dir}")
+    multi_options = list(CLONE_OPTIONS[strategy])
+    if reference and strategy == CloneStrategy.full:
+        multi_options += [f"--reference={reference}", "--dissociate"]
+    repo = git.Repo.clone_from(repo_url, target_dir, multi_options=multi_options)
+    if strategy == CloneStrategy.sparse and sparse_paths:
+        repo.git.sparse_checkout("set", *sparse_paths)
+    logger.info(f"Cloned repository from {repo_url} to {target_dir} using {strategy.value} clone")
 
 
-def fork_repo(github_url: str, github_token: str) -> str:
-    g = github.Github(github_token)
+def _sync_fork(fork_full_name: str, branch: str, github_token: str) -> None:
+    try:
+        result = get_github_api(github_token).merge_upstream(fork_full_name, branch)
+        logger.info(f"Synced fork {fork_full_name}: {result.get('message')}")
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == httpx.codes.NOT_FOUND:
+            raise
+        # A diverged fork (409) can still be used; solving starts from its branch as before.
+        logger.warning(f"Could not sync fork {fork_full_name} with upstream: {e}")
+
+
+def _wait_for_fork_ready(
+    fork_full_name: str, branch: str, github_token: str, timeout: float
+) -> None:
+    # GitHub creates forks asynchronously; cloning too early fails on an empty repo.
+    deadline = time.monotonic() + timeout
+    delay = 1.0
+    while get_github_api(github_token).get_branch(fork_full_name, branch) is None:
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Fork {fork_full_name} not ready after {timeout} seconds")
+        logger.info(f"Waiting {delay:.0f}s for fork {fork_full_name} to become ready")
+        time.sleep(delay)
+        delay = min(delay * 2, 10.0)
+
+
+@traced()
+def fork_repo(
+    github_url: str,
+    github_token: str,
+    registry: Optional[ForkRegistry] = None,
+    ready_timeout: float = 60.0,
+) -> str:
     repo_path = github_url.replace("https://github.com/", "").removesuffix(".git")
-    repo = g.get_repo(repo_path)
-    user = g.get_user()
-    forked_repo = user.create_fork(repo)
-    logger.info("Forked repo: {}", forked_repo.clone_url)
-    return forked_repo.clone_url
 
+    entry = registry.get(repo_path) if registry else None
+    if entry:
+        try:
+            _sync_fork(entry.fork_full_name, entry.default_branch, github_token)
+            logger.info("Using registered fork: {}", entry.clone_url)
+            return entry.clone_url
+        except httpx.HTTPStatusError:
+            logger.warning(f"Registered fork {entry.fork_full_name} is gone, forking again")
+            registry.remove(repo_path)
+
+    github_api = get_github_api(github_token)
+    repo = github_api.get_repo(repo_path)
+    if repo is None:
+        raise ValueError(f"Repository not found: {repo_path}")
+    forked_repo = github_api.create_fork(repo_path)
+    _wait_for_fork_ready(
+        forked_repo["full_name"], repo["default_branch"], github_token, ready_timeout
+    )
+    logger.info("Forked repo: {}", forked_repo["clone_url"])
+
+    if registry:
+        registry.put(
+            repo_path,
+            ForkEntry(
+                fork_full_name=forked_repo["full_name"],
+                clone_url=forked_repo["clone_url"],
+                default_branch=repo["default_branch"],
+                recorded_at=time.time(),
+            ),
+        )
+    return forked_repo["clone_url"]
 
+
+def _default_branch(repo: git.Repo) -> str:
+    # Shallow and single-branch clones only track the default branch, so ask
+    # origin/HEAD instead of guessing between main and master.
+    try:
+        return repo.remotes.origin.refs["HEAD"].reference.remote_head
+    except (IndexError, TypeError, ValueError):
+        pass
+    if "main" not in repo.heads:
+        return "master"
+    return "main"
+
+
+@traced()
 def push_commits(repo_path: str, github_token: str) -> None:
     try:
         repo = git.Repo(repo_path)
@@ -44,10 +150,7 @@ def push_commits(repo_path: str, github_token: str) -> None:
             logger.error("The HEAD is detached. Cannot push commits.")
             return
 
-        if "main" not in repo.heads:
-            main_branch = "master"
-        else:
-            main_branch = "main"
+        main_branch = _default_branch(repo)
 
         if repo.head.commit != repo.remotes.origin.refs[main_branch].commit:
             logger.info("There are commits ahead of the remote branch.")
@@ -71,6 +174,7 @@ def push_commits(repo_path: str, github_token: str) -> None:
         raise
 
 
+@traced()
 def create_pull_request(
     source_repo_name: str,
     target_repo_name: str,
@@ -80,45 +184,49 @@ def create_pull_request(
     pr_body: str = None,
     base_branch: str = "main",
 ) -> str:
+    # PyGithub is only needed here, so processes that never open a PR don't load it.
+    import github
+
     try:
         repo = git.Repo(source_repo_path)
-        g = github.Github(github_token)
+        github_api = get_github_api(github_token)
+        g = github.Github(github_token, base_url=github_api.base_url)
 
         source_repo_name = source_repo_name.removesuffix(".git")
         target_repo_name = target_repo_name.removesuffix(".git")
 
         logger.info(f"Attempting to create PR from {source_repo_name} to {target_repo_name}")
 
-        try:
-            target_repo = g.get_repo(target_repo_name)
-        except github.UnknownObjectException:
+        target_repo_data = github_api.get_repo(target_repo_name)
+        if target_repo_data is None:
             logger.error(f"Target repository not found: {target_repo_name}")
             raise ValueError(f"Target repository not found: {target_repo_name}")
 
-        try:
-            source_repo = g.get_repo(source_repo_name)
-        except github.UnknownObjectException:
+        source_repo_data = github_api.get_repo(source_repo_name)
+        if source_repo_data is None:
             logger.error(f"Source repository not found: {source_repo_name}")
             raise ValueError(f"Source repository not found: {source_repo_name}")
 
-        try:
-            target_repo.get_branch(base_branch)
-        except github.GithubException:
+        # Metadata comes from the ETag-cached client; lazy objects only issue the
+        # compare and create-pull requests below.
+        target_repo = g.get_repo(target_repo_name, lazy=True)
+        target_owner = target_repo_data["owner"]["login"]
+        source_owner = source_repo_data["owner"]["login"]
+
+        if github_api.get_branch(target_repo_name, base_branch) is None:
             logger.warning(f"Base branch '{base_branch}' not found, trying 'master'")
-            try:
-                target_repo.get_branch("master")
-                base_branch = "master"
-            except github.GithubException:
+            if github_api.get_branch(target_repo_name, "master") is None:
                 logger.error("Neither 'main' nor 'master' branch found in target repo")
                 raise ValueError("Could not find a valid base branch")
+            base_branch = "master"
 
         current_branch = repo.active_branch.name
         repo.remotes.origin.fetch()
         
         try:
             comparison = target_repo.compare(
-                base=f"{target_repo.owner.login}:{base_branch}",
-                head=f"{source_repo.owner.login}:{current_branch}"
+                base=f"{target_owner}:{base_branch}",
+                head=f"{source_owner}:{current_branch}"
             )
             
             if comparison.total_commits == 0:
@@ -139,7 +247,7 @@ def create_pull_request(
                 "This pull request contains automated changes pushed to the forked repository."
             )
 
-        head = f"{source_repo.owner.login}:{current_branch}"
+        head = f"{source_owner}:{current_branch}"
         logger.info(f"Creating PR with head={head} and base={base_branch}")
 
         try:
@@ -161,37 +269,6 @@ def create_pull_request(
         raise
 
 
-def extract_repo_name_from_url(repo_url: str) -> str:
-    """Extract the repository name from a GitHub URL.
-
-    Args:
-        repo_url: The GitHub repository URL
-
-    Returns:
-        The repository name in the format "owner/repo"
-    """
-    # Remove trailing slashes and .git suffix
-    repo_url = repo_url.rstrip("/")
-    repo_url = repo_url.removesuffix(".git")
-
-    # Handle both HTTPS and SSH URLs
-    if repo_url.startswith("git@github.com:"):
-        repo_name = repo_url.split("git@github.com:")[-1]
-    else:
-        repo_name = repo_url.split("github.com/")[-1]
-
-    # Validate the repository name format
-    if not repo_name or "/" not in repo_name:
-        raise ValueError(f"Invalid repository URL format: {repo_url}")
-
-    owner, repo = repo_name.split("/", 1)
-    if not owner or not repo:
-        raise ValueError(f"Invalid repository name format: {repo_name}")
-
-    logger.info(f"Extracted repository name: {owner}/{repo}")
-    return f"{owner}/{repo}"
-
-
 def set_git_config(username: str, email: str, repo_dir: str):
     try:
         repo = git.Repo(repo_dir)
@@ -206,6 +283,7 @@ def set_git_config(username: str, email: str, repo_dir: str):
         raise
 
 
+@traced()
 def create_and_push_branch(repo_path, branch_name, github_token):
     try:
         repo = git.Repo(repo_path)
@@ -224,9 +302,6 @@ def create_and_push_branch(repo_path, branch_name, github_token):
         repo.heads[branch_name].checkout()
         logger.info(f"Checked out to branch '{branch_name}'.")
 
-        g = github.Github(github_token)
-        logger.info("Authenticated with GitHub using the provided token.")
-
         origin = repo.remote(name="origin")
         remote_url = origin.url
         logger.info(f"Remote URL: {remote_url}")
@@ -239,13 +314,9 @@ def create_and_push_branch(repo_path, branch_name, github_token):
             logger.error("Unrecognized remote URL format.")
             raise Exception("Invalid remote URL format.")
 
-        github_repo = g.get_repo(repo_path)
-        logger.info(f"Connected to GitHub repository: {github_repo.full_name}")
-
-        remote_branches = [ref.ref.replace("refs/heads/", "") for ref in github_repo.get_git_refs()]
-        logger.info(f"Remote branches fetched: {remote_branches}")
+        remote_ref = get_github_api(github_token).get_ref(repo_path, f"heads/{branch_name}")
 
-        if branch_name in remote_branches:
+        if remote_ref is not None:
             logger.warning(f"Branch '{branch_name}' already exists on the remote.")
         else:
             origin.set_url(f"https://{github_token}@{remote_url.split('://')[-1]}")
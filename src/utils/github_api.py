@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+
+from src.config import get_settings
+from src.utils.metrics import API_ERRORS, count_cache_lookup
+from src.utils.tracing import traced
+
+GITHUB_API_URL = "https://api.github.com"
+TIMEOUT = httpx.Timeout(10.0)
+ETAG_CACHE_MAX_ENTRIES = 1024
+
+
+def _count_api_error(response: httpx.Response) -> None:
+    # 404 answers existence checks and is not an error here.
+    if response.is_error and response.status_code != httpx.codes.NOT_FOUND:
+        API_ERRORS.labels(api="github").inc()
+
+
+class GitHubApiClient:
+    """Thin REST client for the GitHub endpoints PyGithub lacks or over-fetches.
+
+    GET responses are cached with their ETag and revalidated with If-None-Match.
+    GitHub answers unchanged resources with 304, which does not count against the
+    rate limit, so repeated repo/branch lookups are nearly free.
+    """
+
+    def __init__(
+        self,
+        github_token: str,
+        base_url: str = GITHUB_API_URL,
+        transport: Optional[httpx.BaseTransport] = None,
+    ) -> None:
+        self.base_url = base_url
+        self._client = httpx.Client(
+            base_url=base_url,
+            headers={
+                "Authorization": f"Bearer {github_token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+            timeout=TIMEOUT,
+            transport=transport,
+            event_hooks={"response": [_count_api_error]},
+        )
+        self._etag_cache: OrderedDict[str, tuple[str, dict]] = OrderedDict()
+        self._etag_cache_lock = threading.Lock()
+
+    def close(self) -> None:
+        self._client.close()
+
+    @traced("github._get_json")
+    def _get_json(self, path: str) -> Optional[dict]:
+        """GET ``path`` through the ETag cache; None when the resource does not exist."""
+        with self._etag_cache_lock:
+            cached = self._etag_cache.get(path)
+
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self._client.get(path, headers=headers)
+        if cached and response.status_code == httpx.codes.NOT_MODIFIED:
+            count_cache_lookup("github_etag", hit=True)
+            with self._etag_cache_lock:
+                if path in self._etag_cache:
+                    self._etag_cache.move_to_end(path)
+            return cached[1]
+
+        if response.status_code == httpx.codes.NOT_FOUND:
+            with self._etag_cache_lock:
+                self._etag_cache.pop(path, None)
+            return None
+
+        response.raise_for_status()
+        count_cache_lookup("github_etag", hit=False)
+        data = response.json()
+        etag = response.headers.get("etag")
+        if etag:
+            with self._etag_cache_lock:
+                self._etag_cache[path] = (etag, data)
+                self._etag_cache.move_to_end(path)
+                while len(self._etag_cache) > ETAG_CACHE_MAX_ENTRIES:
+                    self._etag_cache.popitem(last=False)
+        return data
+
+    def get_repo(self, full_name: str) -> Optional[dict]:
+        return self._get_json(f"/repos/{full_name}")
+
+    def get_branch(self, full_name: str, branch: str) -> Optional[dict]:
+        return self._get_json(f"/repos/{full_name}/branches/{branch}")
+
+    def get_ref(self, full_name: str, ref: str) -> Optional[dict]:
+        """Look up a single ref such as ``heads/my-branch``."""
+        return self._get_json(f"/repos/{full_name}/git/ref/{ref}")
+
+    @traced("github.create_fork")
+    def create_fork(self, full_name: str) -> dict:
+        response = self._client.post(f"/repos/{full_name}/forks")
+        response.raise_for_status()
+        return response.json()
+
+    @traced("github.merge_upstream")
+    def merge_upstream(self, full_name: str, branch: str) -> dict:
+        response = self._client.post(f"/repos/{full_name}/merge-upstream", json={"branch": branch})
+        response.raise_for_status()
+        return response.json()
+
+
+_clients: dict[str, GitHubApiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_github_api(github_token: str) -> GitHubApiClient:
+    with _clients_lock:
+        if github_token not in _clients:
+            _clients[github_token] = GitHubApiClient(github_token, get_settings().github_api_url)
+        return _clients[github_token]
@@ -0,0 +1,43 @@
+import re
+from typing import Optional
+
+from loguru import logger
+
+
+def find_github_repo_url(text: str) -> Optional[str]:
+    pattern = r"https://github.com/[^\s]+"
+    match = re.search(pattern, text)
+    if match:
+        return match.group(0)
+    return None
+
+
+def extract_repo_name_from_url(repo_url: str) -> str:
+    """Extract the repository name from a GitHub URL.
+
+    Args:
+        repo_url: The GitHub repository URL
+
+    Returns:
+        The repository name in the format "owner/repo"
+    """
+    # Remove trailing slashes and .git suffix
+    repo_url = repo_url.rstrip("/")
+    repo_url = repo_url.removesuffix(".git")
+
+    # Handle both HTTPS and SSH URLs
+    if repo_url.startswith("git@github.com:"):
+        repo_name = repo_url.split("git@github.com:")[-1]
+    else:
+        repo_name = repo_url.split("github.com/")[-1]
+
+    # Validate the repository name format
+    if not repo_name or "/" not in repo_name:
+        raise ValueError(f"Invalid repository URL format: {repo_url}")
+
+    owner, repo = repo_name.split("/", 1)
+    if not owner or not repo:
+        raise ValueError(f"Invalid repository name format: {repo_name}")
+
+    logger.info(f"Extracted repository name: {owner}/{repo}")
+    return f"{owner}/{repo}"
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from src.enums import JobStatus
+
+
+@dataclass
+class Job:
+    instance_id: str
+    status: JobStatus
+    attempts: int
+    error: Optional[str]
+    pr_url: Optional[str]
+    created_at: float
+    updated_at: float
+
+
+class JobStore:
+    """SQLite record of each awarded instance's solve lifecycle.
+
+    Every status change is kept as an event as well, so throughput and time
+    spent per stage can be reported after the fact. Like DiskCache, each
+    operation opens its own connection, which makes the store safe to share
+    between solver threads.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3) -> None:
+        self.path = path
+        self.max_attempts = max_attempts
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    "instance_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                    "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, pr_url TEXT, "
+                    "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS job_events ("
+                    "instance_id TEXT NOT NULL, status TEXT NOT NULL, at REAL NOT NULL)"
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS job_events_at ON job_events (at)")
+            self._initialized = True
+        return connection
+
+    def get(self, instance_id: str) -> Optional[Job]:
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT instance_id, status, attempts, error, pr_url, created_at, updated_at "
+                "FROM jobs WHERE instance_id = ?",
+                (instance_id,),
+            ).fetchone()
+        finally:
+            connection.close()
+        if not row:
+            return None
+        return Job(row[0], JobStatus(row[1]), *row[2:])
+
+    def is_finished(self, instance_id: str) -> bool:
+        """Whether the job needs no more work: messaged, or failed too often to retry."""
+        job = self.get(instance_id)
+        if not job:
+            return False
+        if job.status == JobStatus.messaged:
+            return True
+        return job.status == JobStatus.failed and job.attempts >= self.max_attempts
+
+    def record_awarded(self, instance_id: str) -> None:
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                inserted = connection.execute(
+                    "INSERT OR IGNORE INTO jobs (instance_id, status, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (instance_id, JobStatus.awarded.value, now, now),
+                ).rowcount
+                if inserted:
+                    connection.execute(
+                        "INSERT INTO job_events (instance_id, status, at) VALUES (?, ?, ?)",
+                        (instance_id, JobStatus.awarded.value, now),
+                    )
+        finally:
+            connection.close()
+
+    def start_attempt(self, instance_id: str) -> None:
+        """Count a new attempt at the job, whether it solves or only retries the message."""
+        self.record_awarded(instance_id)
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "UPDATE jobs SET attempts = attempts + 1, updated_at = ? WHERE instance_id = ?",
+                    (time.time(), instance_id),
+                )
+        finally:
+            connection.close()
+
+    def transition(
+        self,
+        instance_id: str,
+        status: JobStatus,
+        error: Optional[str] = None,
+        pr_url: Optional[str] = None,
+    ) -> None:
+        """Move a job to ``status``; a ``pr_url`` is kept once recorded."""
+        self.record_awarded(instance_id)
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ?, error = ?, "
+                    "pr_url = COALESCE(?, pr_url) WHERE instance_id = ?",
+                    (status.value, now, error, pr_url, instance_id),
+                )
+                connection.execute(
+                    "INSERT INTO job_events (instance_id, status, at) VALUES (?, ?, ?)",
+                    (instance_id, status.value, now),
+                )
+        finally:
+            connection.close()
+
+    def status_counts(self) -> dict[JobStatus, int]:
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        finally:
+            connection.close()
+        return {JobStatus(status): count for status, count in rows}
+
+    def transitions_since(self, since: float) -> dict[JobStatus, int]:
+        """How many jobs entered each status since the ``since`` timestamp."""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT status, COUNT(*) FROM job_events WHERE at >= ? GROUP BY status",
+                (since,),
+            ).fetchall()
+        finally:
+            connection.close()
+        return {JobStatus(status): count for status, count in rows}
+
+    def stage_durations(self, since: float = 0) -> dict[JobStatus, float]:
+        """Mean seconds jobs spent in each status before moving on, over events since ``since``."""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT status, AVG(next_at - at) FROM ("
+                "SELECT status, at, LEAD(at) OVER (PARTITION BY instance_id ORDER BY at, rowid) "
+                "AS next_at FROM job_events) "
+                "WHERE next_at IS NOT NULL AND at >= ? GROUP BY status",
+                (since,),
+            ).fetchall()
+        finally:
+            connection.close()
+        return {JobStatus(status): duration for status, duration in rows}
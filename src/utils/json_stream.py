@@ -0,0 +1,53 @@
+import json
+from typing import Any, Iterable, Iterator
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array as its text arrives in chunks.
+
+    Only the element being decoded is buffered, so a long listing can be filtered
+    without building the whole list in memory.
+    """
+    buffer = ""
+    position = 0
+    started = False
+    for chunk in chunks:
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            position = _skip_whitespace(buffer, position)
+            if position >= len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ",":
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                element, end = _DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element continues in the next chunk.
+                break
+            if not isinstance(element, (dict, list, str)) and (
+                end == len(buffer) or buffer[end] not in _WHITESPACE + ",]"
+            ):
+                # A number cut by the chunk boundary ("-0." of "-0.5") decodes as a prefix.
+                break
+            yield element
+            position = end
+    raise ValueError("Unterminated JSON array")
+
+
+def _skip_whitespace(text: str, position: int) -> int:
+    while position < len(text) and text[position] in _WHITESPACE:
+        position += 1
+    return position
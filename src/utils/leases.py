@@ -0,0 +1,230 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from src.config import Settings
+from src.enums import LeaseBackendType
+
+
+class LeaseLostError(RuntimeError):
+    """A lease expired or was taken over by another node while work was in progress."""
+
+
+class LeaseBackend(ABC):
+    """Storage for expiring, owner-tagged claims shared by every provider node."""
+
+    @abstractmethod
+    def try_acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """Claim ``key`` unless another owner holds an unexpired lease on it."""
+
+    @abstractmethod
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """Extend ``owner``'s lease; False when it has expired or changed hands."""
+
+    @abstractmethod
+    def release(self, key: str, owner: str) -> None:
+        """Drop ``owner``'s lease on ``key`` if it still holds it."""
+
+
+class MemoryLeaseBackend(LeaseBackend):
+    """Process-local leases; enough when a single node is running."""
+
+    def __init__(self) -> None:
+        self._leases: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            current = self._leases.get(key)
+            if current and current[0] != owner and current[1] > now:
+                return False
+            self._leases[key] = (owner, now + ttl_seconds)
+            return True
+
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            current = self._leases.get(key)
+            if not current or current[0] != owner or current[1] <= now:
+                return False
+            self._leases[key] = (owner, now + ttl_seconds)
+            return True
+
+    def release(self, key: str, owner: str) -> None:
+        with self._lock:
+            if self._leases.get(key, (None,))[0] == owner:
+                del self._leases[key]
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Leases in a SQLite file, shared by the nodes that can reach it.
+
+    Meant for several replicas on one host or for testing; a file on a network
+    share is only as reliable as that share's locking.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS leases ("
+                    "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+            self._initialized = True
+        return connection
+
+    def try_acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                return (
+                    connection.execute(
+                        "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT (key) DO UPDATE SET "
+                        "owner = excluded.owner, expires_at = excluded.expires_at "
+                        "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                        (key, owner, now + ttl_seconds, now),
+                    ).rowcount
+                    == 1
+                )
+        finally:
+            connection.close()
+
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                return (
+                    connection.execute(
+                        "UPDATE leases SET expires_at = ? "
+                        "WHERE key = ? AND owner = ? AND expires_at > ?",
+                        (now + ttl_seconds, key, owner, now),
+                    ).rowcount
+                    == 1
+                )
+        finally:
+            connection.close()
+
+    def release(self, key: str, owner: str) -> None:
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+        finally:
+            connection.close()
+
+
+class Lease:
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.lost = False
+
+    def ensure_held(self) -> None:
+        if self.lost:
+            raise LeaseLostError(f"Lease on {self.key} was lost")
+
+
+class LeaseManager:
+    """Claims work for this node and keeps its claims alive with heartbeats.
+
+    Held leases are renewed every ``ttl_seconds / 3`` from a background thread.
+    If a node dies its leases simply expire and another node can claim the work.
+    """
+
+    def __init__(self, backend: LeaseBackend, node_id: str, ttl_seconds: float) -> None:
+        self.backend = backend
+        self.node_id = node_id
+        self.ttl_seconds = ttl_seconds
+        self._held: dict[str, Lease] = {}
+        self._lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def try_acquire(self, key: str, ttl_seconds: Optional[float] = None) -> bool:
+        """Claim ``key`` without heartbeats; the claim lapses after its TTL unless released."""
+        return self.backend.try_acquire(key, self.node_id, ttl_seconds or self.ttl_seconds)
+
+    def release(self, key: str) -> None:
+        self.backend.release(key, self.node_id)
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[Optional[Lease]]:
+        """Hold ``key`` for the duration of the block, or yield None if another node has it."""
+        if not self.backend.try_acquire(key, self.node_id, self.ttl_seconds):
+            yield None
+            return
+        lease = Lease(key)
+        with self._lock:
+            self._held[key] = lease
+            self._start_heartbeat()
+        try:
+            yield lease
+        finally:
+            with self._lock:
+                self._held.pop(key, None)
+            if not lease.lost:
+                self.backend.release(key, self.node_id)
+
+    def _start_heartbeat(self) -> None:
+        if self._heartbeat is None or not self._heartbeat.is_alive():
+            self._heartbeat = threading.Thread(
+                target=self._renew_forever, name="lease_heartbeat", daemon=True
+            )
+            self._heartbeat.start()
+
+    def _renew_forever(self) -> None:
+        while True:
+            time.sleep(self.ttl_seconds / 3)
+            with self._lock:
+                leases = list(self._held.values())
+            for lease in leases:
+                try:
+                    renewed = self.backend.renew(lease.key, self.node_id, self.ttl_seconds)
+                except Exception as e:
+                    logger.warning(f"Could not renew lease on {lease.key}: {e}")
+                    continue
+                if not renewed:
+                    logger.error(f"Lost lease on {lease.key}")
+                    lease.lost = True
+                    with self._lock:
+                        self._held.pop(lease.key, None)
+
+
+LEASES_FILENAME = "leases.sqlite3"
+
+_lease_manager: Optional[LeaseManager] = None
+_lease_manager_lock = threading.Lock()
+
+
+def _create_backend(settings: Settings) -> LeaseBackend:
+    if settings.lease_backend == LeaseBackendType.sqlite:
+        return SQLiteLeaseBackend(
+            settings.lease_database_path or os.path.join(settings.state_directory, LEASES_FILENAME)
+        )
+    return MemoryLeaseBackend()
+
+
+def get_lease_manager(settings: Settings) -> LeaseManager:
+    global _lease_manager
+    with _lease_manager_lock:
+        if _lease_manager is None:
+            _lease_manager = LeaseManager(
+                _create_backend(settings), settings.node_id, settings.lease_ttl_seconds
+            )
+            logger.info(f"Coordinating as node {settings.node_id} ({settings.lease_backend.value})")
+        return _lease_manager
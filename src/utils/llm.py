@@ -0,0 +1,81 @@
+import functools
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from src.config import get_settings
+from src.utils.disk_cache import DiskCache
+from src.utils.metrics import API_ERRORS
+from src.utils.tracing import span
+
+if TYPE_CHECKING:
+    import openai
+
+
+@functools.lru_cache(maxsize=None)
+def get_openai_client() -> "openai.OpenAI":
+    """The shared OpenAI client; the SDK is imported on the first completion."""
+    import openai
+
+    return openai.OpenAI(api_key=get_settings().openai_api_key)
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm_cache() -> DiskCache:
+    settings = get_settings()
+    return DiskCache(
+        os.path.join(settings.state_directory, "llm_cache.sqlite3"),
+        settings.llm_cache_ttl_seconds,
+        settings.llm_cache_max_entries,
+        name="llm",
+    )
+
+
+def _cache_key(model: str, messages: list[dict], **kwargs) -> str:
+    payload = json.dumps({"model": model, "messages": messages, **kwargs}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def chat_completion(
+    model: str,
+    messages: list[dict],
+    timeout: Optional[float] = None,
+    validate: Optional[Callable[[str], Any]] = None,
+    **kwargs,
+) -> str:
+    """Return the stripped completion text, served from the LLM cache when possible.
+
+    ``timeout`` is a hard bound on the request: with it the client does not retry,
+    since retries would multiply the wait. It is not part of the cache key.
+    ``validate`` is called on a fresh completion before it is cached; if it raises,
+    the answer is not cached and the error propagates.
+    """
+    cache_enabled = get_settings().llm_cache_enabled
+    key = _cache_key(model, messages, **kwargs)
+    if cache_enabled:
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            return cached
+
+    import openai
+
+    client = get_openai_client()
+    if timeout is not None:
+        client = client.with_options(timeout=timeout, max_retries=0)
+    try:
+        with span("llm.chat_completion", model=model):
+            response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+    except openai.OpenAIError:
+        API_ERRORS.labels(api="openai").inc()
+        raise
+    content = response.choices[0].message.content.strip()
+    if validate is not None:
+        validate(content)
+    if cache_enabled:
+        get_llm_cache().set(key, content)
+    return content
+
+
+def get_llm_cache_stats() -> dict[str, int]:
+    return get_llm_cache().stats()
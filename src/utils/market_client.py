@@ -0,0 +1,223 @@
+import threading
+from datetime import datetime
+from typing import Optional, TypedDict
+
+import httpx
+
+from src.config import Settings
+from src.utils.json_stream import iter_json_array
+from src.utils.metrics import API_ERRORS
+from src.utils.tracing import span
+
+TIMEOUT = httpx.Timeout(10.0)
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+
+
+class Instance(TypedDict, total=False):
+    id: str
+    background: str
+    status: int
+
+
+class Proposal(TypedDict, total=False):
+    id: str
+    instance_id: str
+    status: int
+    creation_date: str
+
+
+class ChatMessage(TypedDict, total=False):
+    message: str
+
+
+def _client_options(settings: Settings) -> dict:
+    return {
+        "base_url": settings.market_url,
+        "headers": {
+            "x-api-key": settings.market_api_key,
+            "Accept": "application/json",
+        },
+        "timeout": TIMEOUT,
+        "limits": LIMITS,
+        "http2": True,
+    }
+
+
+def _conditional_headers(validators: dict[str, str]) -> dict[str, str]:
+    headers = {}
+    if "etag" in validators:
+        headers["If-None-Match"] = validators["etag"]
+    if "last_modified" in validators:
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _response_validators(response: httpx.Response) -> dict[str, str]:
+    validators = {}
+    if "etag" in response.headers:
+        validators["etag"] = response.headers["etag"]
+    if "last-modified" in response.headers:
+        validators["last_modified"] = response.headers["last-modified"]
+    return validators
+
+
+def _raise_for_status(response: httpx.Response) -> None:
+    if response.is_error:
+        API_ERRORS.labels(api="market").inc()
+    response.raise_for_status()
+
+
+class MarketClient:
+    """Blocking market API client sharing one keep-alive connection pool."""
+
+    def __init__(self, settings: Settings, transport: Optional[httpx.BaseTransport] = None) -> None:
+        self.settings = settings
+        self._client = httpx.Client(**_client_options(settings), transport=transport)
+
+    def __enter__(self) -> "MarketClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._client.close()
+
+    def _get(self, url: str, **kwargs) -> httpx.Response:
+        with span("market.get", url=url):
+            response = self._client.get(url, **kwargs)
+        if response.status_code != httpx.codes.NOT_MODIFIED:
+            _raise_for_status(response)
+        return response
+
+    def _post(self, url: str, **kwargs) -> httpx.Response:
+        with span("market.post", url=url):
+            response = self._client.post(url, **kwargs)
+        _raise_for_status(response)
+        return response
+
+    def get_open_instances(self) -> list[Instance]:
+        params = {"instance_status": self.settings.market_open_instance_code}
+        return self._get("/v1/instances/", params=params).json()
+
+    def get_instance(self, instance_id: str) -> Instance:
+        return self._get(f"/v1/instances/{instance_id}").json()
+
+    def get_proposals(self) -> list[Proposal]:
+        return self._get("/v1/proposals/").json()
+
+    def get_proposals_if_changed(
+        self, validators: dict[str, str], status: int, created_after: datetime
+    ) -> tuple[Optional[list[Proposal]], dict[str, str]]:
+        """Conditionally list our proposals with ``status`` created after ``created_after``.
+
+        The filters are sent to the server and applied again while the response is
+        parsed as a stream, so older proposals are dropped without holding the
+        whole listing in memory. Returns ``(None, validators)`` on 304 Not Modified.
+        """
+        params = {"proposal_status": status, "created_after": created_after.isoformat()}
+        headers = _conditional_headers(validators)
+        with (
+            span("market.get", url="/v1/proposals/", streamed=True),
+            self._client.stream("GET", "/v1/proposals/", params=params, headers=headers) as r,
+        ):
+            if r.status_code == httpx.codes.NOT_MODIFIED:
+                return None, validators
+            _raise_for_status(r)
+            proposals = [
+                proposal
+                for proposal in iter_json_array(r.iter_text())
+                if proposal["status"] == status
+                and datetime.fromisoformat(proposal["creation_date"]) > created_after
+            ]
+            return proposals, _response_validators(r)
+
+    def create_proposal(self, instance_id: str, max_bid: float) -> None:
+        url = f"/v1/proposals/create/for-instance/{instance_id}"
+        self._post(url, json={"max_bid": max_bid})
+
+    def get_chat(self, instance_id: str) -> list[ChatMessage]:
+        return self._get(f"/v1/chat/{instance_id}").json()
+
+    def send_message(self, instance_id: str, message: str) -> None:
+        self._post(f"/v1/chat/send-message/{instance_id}", json={"message": message})
+
+
+class AsyncMarketClient:
+    """Asyncio counterpart of MarketClient; one instance per event loop."""
+
+    def __init__(
+        self, settings: Settings, transport: Optional[httpx.AsyncBaseTransport] = None
+    ) -> None:
+        self.settings = settings
+        self._client = httpx.AsyncClient(**_client_options(settings), transport=transport)
+
+    async def __aenter__(self) -> "AsyncMarketClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _get(self, url: str, **kwargs) -> httpx.Response:
+        with span("market.get", url=url):
+            response = await self._client.get(url, **kwargs)
+        if response.status_code != httpx.codes.NOT_MODIFIED:
+            _raise_for_status(response)
+        return response
+
+    async def _post(self, url: str, **kwargs) -> httpx.Response:
+        with span("market.post", url=url):
+            response = await self._client.post(url, **kwargs)
+        _raise_for_status(response)
+        return response
+
+    async def get_open_instances(self) -> list[Instance]:
+        params = {"instance_status": self.settings.market_open_instance_code}
+        return (await self._get("/v1/instances/", params=params)).json()
+
+    async def get_open_instances_if_changed(
+        self, validators: dict[str, str]
+    ) -> tuple[Optional[list[Instance]], dict[str, str]]:
+        """Conditionally list open instances.
+
+        Returns ``(None, validators)`` when the server answers 304 Not Modified,
+        otherwise the instances and the validators to send next time.
+        """
+        params = {"instance_status": self.settings.market_open_instance_code}
+        response = await self._get(
+            "/v1/instances/", params=params, headers=_conditional_headers(validators)
+        )
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            return None, validators
+        return response.json(), _response_validators(response)
+
+    async def get_instance(self, instance_id: str) -> Instance:
+        return (await self._get(f"/v1/instances/{instance_id}")).json()
+
+    async def get_proposals(self) -> list[Proposal]:
+        return (await self._get("/v1/proposals/")).json()
+
+    async def create_proposal(self, instance_id: str, max_bid: float) -> None:
+        url = f"/v1/proposals/create/for-instance/{instance_id}"
+        await self._post(url, json={"max_bid": max_bid})
+
+    async def get_chat(self, instance_id: str) -> list[ChatMessage]:
+        return (await self._get(f"/v1/chat/{instance_id}")).json()
+
+    async def send_message(self, instance_id: str, message: str) -> None:
+        await self._post(f"/v1/chat/send-message/{instance_id}", json={"message": message})
+
+
+_market_client: Optional[MarketClient] = None
+_market_client_lock = threading.Lock()
+
+
+def get_market_client(settings: Settings) -> MarketClient:
+    global _market_client
+    with _market_client_lock:
+        if _market_client is None:
+            _market_client = MarketClient(settings)
+        return _market_client
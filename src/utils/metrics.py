@@ -0,0 +1,36 @@
+from typing import ContextManager
+
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+SOLVE_STAGE_SECONDS = Histogram(
+    "provider_solve_stage_seconds",
+    "Time spent in each stage of solving an instance.",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+SOLVE_OUTCOMES = Counter(
+    "provider_solve_outcomes_total", "Finished solve attempts by outcome.", ["outcome"]
+)
+SOLVES_IN_PROGRESS = Gauge("provider_solves_in_progress", "Instances being solved right now.")
+BIDS = Counter("provider_bids_total", "Proposal submissions by outcome.", ["outcome"])
+CACHE_REQUESTS = Counter(
+    "provider_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"]
+)
+API_ERRORS = Counter("provider_api_errors_total", "Failed requests to external APIs.", ["api"])
+
+
+def time_stage(stage: str) -> ContextManager:
+    """Observe the duration of the enclosed block as solve stage ``stage``."""
+    return SOLVE_STAGE_SECONDS.labels(stage=stage).time()
+
+
+def count_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def start_metrics_server(port: int, address: str) -> None:
+    start_http_server(port, addr=address)
+    logger.info(f"Serving Prometheus metrics on {address}:{port}/metrics")
@@ -0,0 +1,77 @@
+import cProfile
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
+
+from loguru import logger
+
+SAMPLE_INTERVAL_SECONDS = 0.01
+TOP_FUNCTIONS = 30
+
+
+class SamplingProfiler:
+    """Samples the stacks of every thread at a fixed interval.
+
+    cProfile only sees the thread that enabled it, while solves run on worker
+    threads; sampling covers them too. The result is written in the collapsed
+    ("folded") format read by flamegraph tools.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling_profiler", daemon=True)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            names.update({thread.ident: thread.name for thread in threading.enumerate()})
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.items():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile(output_prefix: str) -> Iterator[None]:
+    """Profile the enclosed block into ``<prefix>.prof`` (cProfile) and ``<prefix>.folded``."""
+    sampler = SamplingProfiler()
+    profiler = cProfile.Profile()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        profiler.dump_stats(f"{output_prefix}.prof")
+        sampler.write(f"{output_prefix}.folded")
+        stats = pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.print_stats(TOP_FUNCTIONS)
+        logger.info(
+            f"Profile written to {output_prefix}.prof and "
+            f"{output_prefix}.folded ({sum(sampler.samples.values())} samples)"
+        )
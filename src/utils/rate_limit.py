@@ -0,0 +1,93 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from loguru import logger
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {
+    httpx.codes.TOO_MANY_REQUESTS,
+    httpx.codes.BAD_GATEWAY,
+    httpx.codes.SERVICE_UNAVAILABLE,
+    httpx.codes.GATEWAY_TIMEOUT,
+}
+
+
+class AsyncTokenBucket:
+    """Token bucket shared by the coroutines of one event loop.
+
+    Tokens refill at ``rate`` per second up to ``capacity``; ``acquire`` waits
+    until one is available.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+async def retry_async(
+    func: Callable[[], Awaitable[T]],
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+) -> T:
+    """Await ``func`` until it succeeds, backing off exponentially between retryable errors.
+
+    Rate-limit and gateway responses and transport errors are retried; a
+    Retry-After header overrides the computed delay. Other errors are raised at once.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == attempts or not _is_retryable(e):
+                raise
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+            delay *= random.uniform(0.5, 1)
+            if isinstance(e, httpx.HTTPStatusError):
+                retry_after = retry_after_seconds(e.response)
+                if retry_after is not None:
+                    delay = min(max_delay, retry_after)
+            logger.warning(f"Attempt {attempt}/{attempts} failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
@@ -0,0 +1,137 @@
+import fcntl
+import hashlib
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import git
+from loguru import logger
+
+from src.utils.tracing import span
+
+# Mirrors are fetched anonymously; fail fast instead of prompting for credentials.
+NO_PROMPT_ENV = {"GIT_TERMINAL_PROMPT": "0"}
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class RepoMirrorCache:
+    """Bare mirrors of upstream repositories, used as object references for clones.
+
+    Each mirror has a sibling lock file. Updating a mirror takes an exclusive lock,
+    cloning from it a shared one, and eviction only removes mirrors it can lock
+    exclusively without waiting, so mirrors in use are never deleted.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _mirror_path(self, repo_url: str) -> str:
+        normalized = repo_url.rstrip("/").removesuffix(".git").lower()
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root, f"{digest}.git")
+
+    @contextmanager
+    def _lock(self, mirror_path: str, mode: int) -> Iterator[None]:
+        os.makedirs(self.root, exist_ok=True)
+        lock_path = f"{mirror_path}.lock"
+        while True:
+            with open(lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, mode)
+                try:
+                    # Eviction unlinks the lock file while holding it; a lock taken on
+                    # the unlinked file no longer excludes anyone, so take it again.
+                    if os.path.exists(lock_path) and os.path.samestat(
+                        os.fstat(lock_file.fileno()), os.stat(lock_path)
+                    ):
+                        yield
+                        return
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _update(self, repo_url: str, mirror_path: str) -> bool:
+        """Create or refresh the mirror; call with the exclusive lock held.
+
+        Returns whether the mirror is up to date. A mirror that fails to update is
+        kept for the next attempt, a failed initial clone is removed.
+        """
+        exists = os.path.isdir(mirror_path)
+        with span("git.mirror_update", repo_url=repo_url, created=not exists):
+            if exists:
+                try:
+                    repo = git.Repo(mirror_path)
+                    with repo.git.custom_environment(**NO_PROMPT_ENV):
+                        repo.git.remote("update", "--prune")
+                except git.GitCommandError as e:
+                    logger.warning(f"Could not update the mirror of {repo_url}: {e}")
+                    return False
+                logger.info(f"Updated mirror of {repo_url} at {mirror_path}")
+            else:
+                try:
+                    git.Repo.clone_from(repo_url, mirror_path, mirror=True, env=NO_PROMPT_ENV)
+                except git.GitCommandError as e:
+                    logger.warning(f"Could not mirror {repo_url}: {e}")
+                    shutil.rmtree(mirror_path, ignore_errors=True)
+                    return False
+                logger.info(f"Created mirror of {repo_url} at {mirror_path}")
+        os.utime(mirror_path)
+        return True
+
+    @contextmanager
+    def reference(self, repo_url: str) -> Iterator[Optional[str]]:
+        """Yield an up-to-date mirror path for ``repo_url``, or None if it cannot be mirrored."""
+        mirror_path = self._mirror_path(repo_url)
+        with self._lock(mirror_path, fcntl.LOCK_EX):
+            updated = self._update(repo_url, mirror_path)
+        if not updated:
+            logger.info(f"Cloning {repo_url} without a reference")
+            yield None
+            return
+
+        with self._lock(mirror_path, fcntl.LOCK_SH):
+            yield mirror_path
+
+        self.evict(keep=mirror_path)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        if not os.path.isdir(self.root):
+            return
+
+        names = os.listdir(self.root)
+        mirrors = [os.path.join(self.root, name) for name in names if name.endswith(".git")]
+        for name in names:
+            # Lock files left behind by mirrors that failed to clone.
+            mirror_path = os.path.join(self.root, name.removesuffix(".lock"))
+            if name.endswith(".git.lock") and not os.path.isdir(mirror_path):
+                try:
+                    with self._lock(mirror_path, fcntl.LOCK_EX | fcntl.LOCK_NB):
+                        if not os.path.isdir(mirror_path):
+                            os.unlink(f"{mirror_path}.lock")
+                except BlockingIOError:
+                    continue
+        sizes = {path: _directory_size(path) for path in mirrors}
+        total = sum(sizes.values())
+        for path in sorted(mirrors, key=os.path.getmtime):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                with self._lock(path, fcntl.LOCK_EX | fcntl.LOCK_NB):
+                    shutil.rmtree(path)
+                    os.unlink(f"{path}.lock")
+            except BlockingIOError:
+                continue
+            total -= sizes[path]
+            logger.info(f"Evicted repository mirror {path}")
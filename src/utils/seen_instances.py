@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+from typing import Iterable
+
+from loguru import logger
+
+
+class SeenInstanceIndex:
+    """Instance ids already seen or bid on, persisted between scans.
+
+    Also keeps the validators (ETag / Last-Modified) of the last open-instance
+    listing so the next scan can issue a conditional request.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.instance_ids: set[str] = set()
+        self.validators: dict[str, str] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable seen-instance index {self.path}: {e}")
+            return
+        self.instance_ids = set(data.get("instance_ids", []))
+        self.validators = data.get("validators", {})
+
+    def __contains__(self, instance_id: str) -> bool:
+        return instance_id in self.instance_ids
+
+    def __len__(self) -> int:
+        return len(self.instance_ids)
+
+    def add(self, instance_id: str) -> None:
+        self.instance_ids.add(instance_id)
+
+    def retain(self, instance_ids: Iterable[str]) -> None:
+        """Forget instances that are no longer open so the index stays bounded."""
+        self.instance_ids &= set(instance_ids)
+
+    def save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        data = {"instance_ids": sorted(self.instance_ids), "validators": self.validators}
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as f:
+            json.dump(data, f)
+        os.replace(f.name, self.path)
@@ -0,0 +1,134 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from loguru import logger
+
+from src.config import get_settings
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, attributes: dict[str, Any]) -> None:
+        parent = _current_span.get()
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class SpanExporter:
+    """Appends finished spans to a file as JSON lines, one object per span."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, record: dict) -> None:
+        line = json.dumps(record, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+_UNCONFIGURED: Any = object()
+_exporter: Optional[SpanExporter] = _UNCONFIGURED
+_configure_lock = threading.Lock()
+
+
+def configure_tracing(path: Optional[str]) -> None:
+    """Export spans to ``path``; None turns tracing off."""
+    global _exporter
+    _exporter = SpanExporter(path) if path else None
+    if path:
+        logger.info(f"Writing trace spans to {path}")
+
+
+def _get_exporter() -> Optional[SpanExporter]:
+    # TRACE_FILE is read on the first span rather than at import time.
+    if _exporter is _UNCONFIGURED:
+        with _configure_lock:
+            if _exporter is _UNCONFIGURED:
+                configure_tracing(get_settings().trace_file)
+    return _exporter
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Trace the enclosed block as a child of the current span.
+
+    Yields None without recording anything while tracing is off, so spans are
+    cheap to leave in hot paths.
+    """
+    exporter = _get_exporter()
+    if exporter is None:
+        yield None
+        return
+
+    current = Span(name, attributes)
+    token = _current_span.set(current)
+    start_time = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        exporter.export(
+            {
+                "trace_id": current.trace_id,
+                "span_id": current.span_id,
+                "parent_id": current.parent_id,
+                "name": name,
+                "start_time": start_time,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "status": "error" if error else "ok",
+                "error": error,
+                "thread": threading.current_thread().name,
+                "attributes": current.attributes,
+            }
+        )
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator tracing every call of a function or coroutine function."""
+
+    def decorator(func: F) -> F:
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator